@@ -2,86 +2,45 @@ import streamlit as st
 import pandas as pd
 from streamlit.components.v1 import html as st_html
 
-from settings import get_logo_image, get_logo_data_uri
+from settings import get_logo_icon
 from settings import (
-    COLOR_NAVY, COLOR_NAVY_TEXT,
+    COLOR_NAVY_TEXT,
     APP_USER, APP_PASS,
+    TASKS_DB_URL, TASKS_DB_TABLE,
+    BOARD_PAGE_SIZES, ADMIN_USERS, BASE_REFRESH_SECONDS, LIVE_REFRESH_SECONDS,
+    DELAY_ANALYTICS_THRESHOLD, BASE_CACHE_DIR,
 )
 
+import instrumentation
+from base_cache import base_cache_status, cold_start
+from board_export import EXPORT_FORMATS, export_bytes, export_cache_stats
+from chrome import CLOCK_SCRIPT, HIDE_CLOCK_IFRAME_CSS, header_html, login_html
+from data_source import SqlTaskSource
 from filters import distinct_aircraft, distinct_flights
-from mock_data import pivot_table
-from utility import render_table_html
+from instrumentation import stage
+from mock_data import (
+    pivot_table, pivot_cache_stats, pivot_cache_key, data_version, get_data_source, set_data_source,
+    start_background_refresh, refresh_status, sync_snapshot, delay_cube, date_range,
+)
+from utility import render_table_html, page_bounds, row_cache_stats
+
+if TASKS_DB_URL and get_data_source() is None:
+    set_data_source(SqlTaskSource(TASKS_DB_URL, TASKS_DB_TABLE))
+if BASE_CACHE_DIR and get_data_source() is None:
+    cold_start()
+if BASE_REFRESH_SECONDS > 0:
+    start_background_refresh(BASE_REFRESH_SECONDS)
+sync_snapshot()
 
 st.set_page_config(
     page_title="Flight Monitor (Powered by Diyorbek)",
-    page_icon=get_logo_image(),
+    page_icon=get_logo_icon(),
     layout="wide",
 )
 
 
-LOGO_DATA_URI = get_logo_data_uri()
-
-
 def render_login():
-    st.markdown(
-        f"""
-        <style>
-          .ca-login-wrap{{
-            min-height: 40vh; display:flex; align-items:flex-start; justify-content:center;
-            padding:40px 16px;
-          }}
-          .ca-login{{
-            width:520px; border-radius:22px;
-            background:#0E1A30;
-            border:1px solid rgba(148,163,184,.18);
-            box-shadow: 0 35px 70px rgba(2,6,23,.45);
-            color:#E5E7EB; padding:28px 26px 22px;
-          }}
-          .ca-login .title{{
-            display:flex; flex-direction:column; align-items:center; gap:14px; margin:0 0 6px 0;
-          }}
-          .ca-login .title img{{height:56px;width:56px;border-radius:14px;}}
-          .ca-login .title h2{{margin:0; font-size:24px; font-weight:800; color:#fff; letter-spacing:.2px;}}
-          .ca-login [data-testid="stMarkdownContainer"] h1 a,
-          .ca-login [data-testid="stMarkdownContainer"] h2 a{{display:none!important;}}
-          .ca-login [data-testid="stForm"]{{background:transparent!important; padding:0!important; border:none!important;}}
-          .ca-login .field-label{{font-size:13px; color:#cbd5e1; margin:12px 2px 6px 2px; font-weight:600;}}
-          .ca-login .stTextInput > div > div{{
-            background:#ffffff !important;
-            border:1px solid #E2E8F0 !important;
-            border-radius:12px; padding:2px 12px;
-          }}
-          .ca-login input[type="text"],
-          .ca-login input[type="password"]{{
-            height:46px; background:#ffffff !important;
-            color:#0f172a !important;
-            border:none !important; box-shadow:none !important; border-radius:9px; font-size:15px;
-          }}
-          .ca-login input::placeholder{{ color:#64748b !important; opacity:1; }}
-          .ca-login input:-webkit-autofill{{
-            -webkit-box-shadow: 0 0 0px 1000px #ffffff inset !important;
-            -webkit-text-fill-color:#0f172a !important; caret-color:#0f172a !important;
-          }}
-          .ca-login .stButton > button{{
-            width:100%; height:48px; border-radius:12px;
-            background:#F43F5E !important; color:#fff !important; border:1px solid #F43F5E !important;
-            font-weight:800; letter-spacing:.2px; margin-top:10px; font-size:15px;
-          }}
-          .ca-login .stButton > button:hover{{ filter:brightness(1.06); }}
-          #MainMenu{{visibility:hidden;}}
-          header [data-testid="stToolbar"]{{display:none!important;}}
-          footer{{visibility:hidden;}}
-          div[data-testid="stStatusWidget"]{{display:none!important;}}
-        </style>
-        <div class="ca-login-wrap">
-          <div class="ca-login">
-            <div class="title">
-              <img src="{LOGO_DATA_URI}" />
-              <h2>Sign in to continue</h2>
-            </div>
-        """,
-        unsafe_allow_html=True,
-    )
+    st.markdown(login_html(), unsafe_allow_html=True)
 
     with st.form("login_form", clear_on_submit=False, border=False):
         st.markdown('<div class="field-label">Username</div>', unsafe_allow_html=True)
@@ -95,6 +54,7 @@ def render_login():
         if ok:
             if u == APP_USER and p == APP_PASS:
                 st.session_state.auth_ok = True
+                st.session_state.username = u
                 st.rerun()
             else:
                 st.error("Incorrect username or password")
@@ -109,71 +69,13 @@ if not st.session_state.auth_ok:
     render_login()
     st.stop()
 
-st.markdown(
-    f"""
-<style>
-#MainMenu {{ visibility: hidden; }}
-header [data-testid="stToolbar"] {{ display: none; }}
-footer {{ visibility: hidden; }}
-h1.app-title {{ font-size: 28px !important; margin: 0 !important; font-weight: 700 !important; letter-spacing: .2px; }}
-div.app-time {{ font-size: 18px; font-weight: 600; letter-spacing: .5px; opacity: 0.95; }}
-.table-wrap {{ overflow:auto; border:1px solid #E5E7EB; border-radius:10px; max-height:92vh; }}
-table thead th {{
-  font-size: 13px !important; line-height: 1.25; vertical-align: bottom; white-space: normal; word-break: break-word;
-  position: sticky; top: 0; background:{COLOR_NAVY}; color:#FFFFFF; padding:8px; text-align:left;
-}}
-.tabs label {{
-  border: 1px solid #cbd5e1; padding: 8px 12px; margin-right: 8px; border-radius: 10px; background: #ffffff; color: #0f172a;
-  cursor: pointer; transition: all .15s ease;
-}}
-.tabs label:hover {{ border-color: {COLOR_NAVY}; }}
-.tabs label[data-checked="true"] {{ background: {COLOR_NAVY}; color: #FFFFFF; border-color: {COLOR_NAVY}; }}
-.tabs input[type="radio"] {{ display:none; }}
-.filter-label {{ font-size:13px; color:#475569; margin-bottom:6px; }}
-@media (prefers-color-scheme: dark) {{ .table-wrap {{ border-color: #1f2937; }} }}
-</style>
-<div style="display:flex;justify-content:space-between;align-items:center;background:{COLOR_NAVY};color:#FFFFFF;padding:12px 16px;border-radius:12px;margin-bottom:10px;">
-  <div style="display:flex;gap:12px;align-items:center;">
-    <img src="{LOGO_DATA_URI}" style="height:40px;width:auto;border-radius:6px;object-fit:contain;" />
-    <h1 class="app-title">Ground Handling Tasks (Powered by Diyorbek)</h1>
-  </div>
-  <div class="app-time"><span id="local-clock"></span></div>
-</div>
-""",
-    unsafe_allow_html=True,
-)
+instrumentation.begin_rerun(user=st.session_state.get("username"))
 
-st_html(
-    """
-<script>
-(function(){
-  function pad(n){return n.toString().padStart(2,'0');}
-  function tick(){
-    const d = new Date();
-    const s = pad(d.getDate())+'-'+pad(d.getMonth()+1)+'-'+d.getFullYear()
-            +' '+pad(d.getHours())+':'+pad(d.getMinutes())+':'+pad(d.getSeconds());
-    const el = window.parent.document.querySelector('.app-time #local-clock');
-    if(el) el.textContent = s;
-  }
-  tick();
-  setInterval(tick, 1000);
-})();
-</script>
-""",
-    height=0,
-)
+st.markdown(header_html(), unsafe_allow_html=True)
 
-st.markdown(
-    """
-<style>
-iframe[title="streamlit.components.v1.html"]{
-  pointer-events:none !important; width:0 !important; height:0 !important;
-  position:absolute !important; left:-9999px !important; opacity:0 !important; z-index:-1 !important;
-}
-</style>
-""",
-    unsafe_allow_html=True,
-)
+st_html(CLOCK_SCRIPT, height=0)
+
+st.markdown(HIDE_CLOCK_IFRAME_CSS, unsafe_allow_html=True)
 
 if "selected_table" not in st.session_state:
     st.session_state.selected_table = "all"
@@ -189,42 +91,171 @@ tab = st.radio(
 st.markdown('</div>', unsafe_allow_html=True)
 st.session_state.selected_table = tab.lower()
 
-fc1, fc2, fc3 = st.columns([2, 2, 1.2])
+fc1, fc2, fc3, fc4 = st.columns([2, 2, 1.4, 1.2])
 
 with fc3:
-    st.markdown('<div class="filter-label">Date</div>', unsafe_allow_html=True)
-    date_choice = st.selectbox("", ["All dates", "Today", "Yesterday"], index=0, key="date_choice_select")
+    st.markdown('<div class="filter-label">Dates</div>', unsafe_allow_html=True)
+    days = st.date_input("", value=(), format="YYYY-MM-DD", key="date_range_input", label_visibility="collapsed")
+with fc4:
+    st.markdown('<div class="filter-label">Shift</div>', unsafe_allow_html=True)
+    shift = st.slider("", 0, 24, (0, 24), format="%02d:00", key="shift_hours", disabled=not days,
+                      label_visibility="collapsed")
+# No days picked means all dates; a partial pick (first day only) selects that day.
+if days:
+    date_choice = date_range(days[0], days[-1], shift if shift != (0, 24) else None)
+    date_slug = f"{days[0]:%Y%m%d}-{days[-1]:%Y%m%d}" + (f"-{shift[0]:02d}-{shift[1]:02d}h" if shift != (0, 24) else "")
+else:
+    date_choice, date_slug = "All dates", "all-dates"
+st.session_state.date_filter = (date_choice, date_slug)
 
-aircraft_opts = distinct_aircraft(date_choice, st.session_state.get("filter_flights", []))
+with stage("distinct_aircraft") as rec:
+    aircraft_opts = distinct_aircraft(date_choice, st.session_state.get("filter_flights", []))
+    rec["options"] = len(aircraft_opts)
 with fc1:
     st.markdown('<div class="filter-label">Aircraft number</div>', unsafe_allow_html=True)
     aircraft_selected = st.multiselect(
         "",
         options=aircraft_opts,
-        default=st.session_state.get("filter_aircraft", []),
+        default=[a for a in st.session_state.get("filter_aircraft", []) if a in aircraft_opts],
         placeholder="Type or pick aircraft",
         key="aircraft_ms",
     )
     st.session_state["filter_aircraft"] = aircraft_selected
 
-flight_opts = distinct_flights(date_choice, aircraft_selected)
+with stage("distinct_flights") as rec:
+    flight_opts = distinct_flights(date_choice, aircraft_selected)
+    rec["options"] = len(flight_opts)
 with fc2:
     st.markdown('<div class="filter-label">Flight number</div>', unsafe_allow_html=True)
     flight_selected = st.multiselect(
         "",
         options=flight_opts,
-        default=st.session_state.get("filter_flights", []),
+        default=[f for f in st.session_state.get("filter_flights", []) if f in flight_opts],
         placeholder="Type or pick flight",
         key="flight_ms",
     )
     st.session_state["filter_flights"] = flight_selected
 
-df = pivot_table(st.session_state.selected_table, date_choice, aircraft_selected, flight_selected)
 
-if df.empty:
-    st.warning("No Information")
-    st.stop()
+def render_board():
+    """The table, its paging controls and diagnostics; reruns on its own in live mode."""
+    if not instrumentation.active():
+        instrumentation.begin_rerun(user=st.session_state.get("username"), fragment="board")
+        sync_snapshot()
+    tab = st.session_state.selected_table
+    date_choice, date_slug = st.session_state.date_filter
+    aircraft_selected = st.session_state.get("filter_aircraft", [])
+    flight_selected = st.session_state.get("filter_flights", [])
+
+    # A scheduled run with unchanged data and filters reuses the previous board as is.
+    board_key = (data_version(), tab, date_choice, tuple(aircraft_selected), tuple(flight_selected))
+    board = st.session_state.get("board")
+    if board is None or board["key"] != board_key:
+        with stage("pivot_table") as rec:
+            hits_before = pivot_cache_stats()["hits"] if instrumentation.enabled() else 0
+            df = pivot_table(tab, date_choice, aircraft_selected, flight_selected)
+            if instrumentation.enabled():
+                rec["cache_hit"] = pivot_cache_stats()["hits"] > hits_before
+            rec["rows"], rec["cols"] = df.shape
+        board = st.session_state.board = {"key": board_key, "df": df, "page": None, "html": ""}
+    df = board["df"]
+
+    if df.empty:
+        st.warning("No Information")
+    else:
+        pc1, pc2, pc3 = st.columns([1.2, 1, 3])
+        with pc1:
+            st.markdown('<div class="filter-label">Rows per page</div>', unsafe_allow_html=True)
+            page_size = st.selectbox("", BOARD_PAGE_SIZES, index=0, key="page_size", label_visibility="collapsed")
+        pages = page_bounds(len(df), 1, page_size)[1]
+        if st.session_state.get("board_page", 1) > pages:
+            st.session_state.board_page = pages
+        with pc2:
+            st.markdown('<div class="filter-label">Page</div>', unsafe_allow_html=True)
+            page = st.number_input("", min_value=1, max_value=pages, step=1, key="board_page",
+                                   label_visibility="collapsed")
+        page, pages, start, stop = page_bounds(len(df), page, page_size)
+        with pc3:
+            st.markdown(
+                f'<div class="filter-label" style="margin-top:26px;">Rows {start + 1}–{stop} of {len(df)}</div>',
+                unsafe_allow_html=True,
+            )
+
+        if board["page"] != (start, stop):
+            # Rows whose cells, delay flags and stripe are unchanged come from the shared row cache.
+            with stage("render_table_html") as rec:
+                board["html"] = render_table_html(df.iloc[start:stop], css_classes=True, start_row=start)
+                board["page"] = (start, stop)
+                rec["rows"], rec["html_bytes"] = stop - start, len(board["html"].encode("utf-8"))
+        with stage("st_markdown"):
+            st.markdown(board["html"], unsafe_allow_html=True)
+
+        # The file is built only when the button is clicked, off the script thread, and shared
+        # by every session downloading the same board at the same dataset version.
+        export_key = pivot_cache_key(tab, date_choice, aircraft_selected, flight_selected)
+        ec1, ec2 = st.columns([1.2, 4])
+        with ec1:
+            fmt = st.selectbox("", list(EXPORT_FORMATS), index=0, key="export_format", label_visibility="collapsed")
+        with ec2:
+            ext, mime = EXPORT_FORMATS[fmt]
+            st.download_button(
+                "Download board",
+                data=lambda: export_bytes(df, fmt, export_key),
+                file_name=f"flight-board-{tab}-{date_slug}.{ext}",
+                mime=mime,
+                on_click="ignore",
+                key="export_download",
+            )
+
+    trace = instrumentation.end_rerun()
+    if trace and st.session_state.get("username") in ADMIN_USERS:
+        with st.expander("Diagnostics", expanded=False):
+            st.caption(f"Rerun {trace['total_ms']:.1f} ms · pivot cache {pivot_cache_stats()}")
+            st.caption(f"Row cache {row_cache_stats()}")
+            st.caption(f"Export cache {export_cache_stats()}")
+            st.caption(f"Base refresh {refresh_status()}")
+            if BASE_CACHE_DIR:
+                st.caption(f"Base cache {base_cache_status()}")
+            st.dataframe(pd.DataFrame(trace["stages"]), hide_index=True, width="stretch")
+
+
+st.fragment(render_board, run_every=LIVE_REFRESH_SECONDS or None)()
+
+
+DELAY_GROUPINGS = {"Task": "task", "Aircraft": "aircraft", "Hour of day": "hour", "Task × hour": ("task", "hour")}
+
+
+def render_delay_summary():
+    """Delay statistics read from the pre-aggregated cubes; changing the view reruns only this part."""
+    if not instrumentation.active():
+        instrumentation.begin_rerun(user=st.session_state.get("username"), fragment="delay_summary")
+    dc1, dc2 = st.columns([2, 1.2])
+    with dc1:
+        st.markdown('<div class="filter-label">Group by</div>', unsafe_allow_html=True)
+        grouping = st.selectbox("", list(DELAY_GROUPINGS), index=0, key="delay_group", label_visibility="collapsed")
+    with dc2:
+        st.markdown('<div class="filter-label">Delay threshold (actual / estimated)</div>', unsafe_allow_html=True)
+        threshold = st.number_input("", min_value=1.0, max_value=3.0, value=DELAY_ANALYTICS_THRESHOLD, step=0.01,
+                                    key="delay_threshold", label_visibility="collapsed")
+
+    with stage("delay_summary") as rec:
+        cube = delay_cube(round(threshold, 2))
+        overall = cube.stats()
+        summary = cube.summary(DELAY_GROUPINGS[grouping])
+        aircraft_selected = st.session_state.get("filter_aircraft", [])
+        if grouping == "Aircraft" and aircraft_selected:
+            summary = summary[summary.index.isin(aircraft_selected)]
+        rec["rows"] = len(summary)
+
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("Delay rate", f"{overall['delay_rate']:.1%}" if overall["tasks"] else "–")
+    m2.metric("p50 overrun (min)", f"{overall['p50_overrun']:+.0f}" if overall["tasks"] else "–")
+    m3.metric("p95 overrun (min)", f"{overall['p95_overrun']:+.0f}" if overall["tasks"] else "–")
+    m4.metric("Mean start offset (min)", f"{overall['mean_start_offset']:+.1f}" if overall["tasks"] else "–")
+    st.dataframe(summary.reset_index(), hide_index=True, width="stretch")
+    instrumentation.end_rerun()
 
-from utility import render_table_html
 
-st.markdown(render_table_html(df), unsafe_allow_html=True)
+if get_data_source() is None:
+    with st.expander("Delay analytics", expanded=False):
+        st.fragment(render_delay_summary)()
@@ -0,0 +1,219 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import mock_data
+from filter_index import FilterIndex
+from mock_data import DELAY_THRESHOLD, TASK_COLUMNS, TIME_INDEX_COLUMNS
+from settings import BASE_CACHE_DIR, COMPACT_DATASET, SNAPSHOT_DIR
+from snapshot import read_cache, write_cache
+
+_LOGGER = logging.getLogger(__name__)
+
+# On-disk base cache: the fingerprint cold_start chose and how the last start went.
+_BASE_CACHE = {"fingerprint": None, "restored": None, "seconds": None, "watermark": None, "caught_up": None,
+               "saved": None, "last_error": None, "thread": None}
+_BASE_CACHE_LOCK = threading.Lock()
+
+_CACHE_NAMES = ("base", "base-filters")
+_ORDER_PREFIX = "__order_"
+_START_PREFIX = "__start_"
+# Identifies a task across a restart: everything but its completion, which a task in progress lacks.
+_TASK_KEY = ["flight_number_meridian", "airfcraft_meridian", "task_name", "started_at"]
+
+
+def _base_fingerprint(source) -> str:
+    identity = {
+        # Mock rows are generated around the current time, so a cached mock dataset expires with its day.
+        "source": f"mock@{pd.Timestamp('today').date()}" if source is None else source.fingerprint(),
+        "columns": TASK_COLUMNS,
+        "delay_threshold": DELAY_THRESHOLD,
+        "compact": COMPACT_DATASET,
+    }
+    return hashlib.sha256(json.dumps(identity).encode()).hexdigest()[:16]
+
+
+def _ranks(order: np.ndarray, n: int) -> np.ndarray:
+    """Each row's place in ``order``, -1 for rows it leaves out; _order inverts it in linear time."""
+    rank = np.full(n, -1, dtype=np.int32 if n < 2**31 else np.int64)
+    rank[order] = np.arange(len(order))
+    return rank
+
+
+def _order(rank: np.ndarray) -> np.ndarray:
+    held = np.flatnonzero(rank >= 0)
+    order = np.empty(len(held), dtype=np.intp)
+    order[rank[held]] = held
+    return order
+
+
+def _grouped_positions(values: pd.Series, order: np.ndarray, starts: np.ndarray) -> dict:
+    """``{value: positions}`` from an order listing each value's rows contiguously, flagged at each group's first row."""
+    starts = np.flatnonzero(starts[order])
+    return dict(zip(values.take(order[starts]).tolist(), np.split(order, starts[1:]))) if len(order) else {}
+
+
+def _cache_frames(index: dict) -> dict:
+    """The base frame with its row orders as rank and group-start columns, and the filter index's pair counts."""
+    frame = index["frame"]
+    orders = {col: index["by_time"][col][1] for col in TIME_INDEX_COLUMNS}
+    extra = {}
+    for name in ("by_aircraft", "by_flight"):
+        parts = [p for p in index[name].values() if len(p)]
+        orders[name] = np.concatenate(parts) if parts else np.empty(0, dtype=np.intp)
+        starts = np.zeros(len(frame), dtype=bool)
+        starts[[p[0] for p in parts]] = True
+        extra[_START_PREFIX + name] = starts
+    extra.update({_ORDER_PREFIX + name: _ranks(order, len(frame)) for name, order in orders.items()})
+    return {"base": frame.assign(**extra), "base-filters": index["filters"].pair_frame()}
+
+
+def _restored_index(frame: pd.DataFrame) -> dict:
+    """Base index of a cached frame, taking its rank and group-start columns out; the filter index follows later."""
+    extra = {c: frame.pop(c).to_numpy() for c in list(frame.columns) if c.startswith((_ORDER_PREFIX, _START_PREFIX))}
+    orders = {c[len(_ORDER_PREFIX):]: _order(v) for c, v in extra.items() if c.startswith(_ORDER_PREFIX)}
+    # The filter index is restored from the cached pairs by _finish_restore.
+    return mock_data.build_base_index(frame, filters=False, lookups={
+        "by_aircraft": _grouped_positions(frame["airfcraft_meridian"], orders["by_aircraft"],
+                                          extra[_START_PREFIX + "by_aircraft"]),
+        "by_flight": _grouped_positions(frame["flight_number_meridian"], orders["by_flight"],
+                                        extra[_START_PREFIX + "by_flight"]),
+        "by_time": {col: (frame[col].to_numpy(dtype="datetime64[ns]")[orders[col]], orders[col])
+                    for col in TIME_INDEX_COLUMNS},
+    })
+
+
+def _catch_up_events(rows: pd.DataFrame, base: pd.DataFrame) -> pd.DataFrame:
+    """Fetched ``rows`` as task events: a row of a task ``base`` holds updates it, any other is appended.
+
+    Tasks are matched on _TASK_KEY, which leaves out ``completed_at`` so a task cached in
+    progress is found once completed. Rows the base already holds unchanged are dropped.
+    """
+    rows = rows[TASK_COLUMNS].reset_index(drop=True)
+    held = base[~(base["started_at"] < rows["started_at"].min())]  # NaT start times compare False and stay
+    labels = _task_keys(held).assign(task_id=held.index).drop_duplicates(_TASK_KEY, keep="last")
+    found = _task_keys(rows).merge(labels, on=_TASK_KEY, how="left")["task_id"].to_numpy(dtype=np.float64)
+
+    matched = np.flatnonzero(~np.isnan(found))
+    old = base.loc[found[matched].astype(np.int64), TASK_COLUMNS]
+    same = np.ones(len(matched), dtype=bool)
+    for c in TASK_COLUMNS:
+        a = rows[c].iloc[matched].astype(object).to_numpy()
+        b = old[c].astype(object).to_numpy()
+        same &= (a == b) | (pd.isna(a) & pd.isna(b))
+    keep = np.ones(len(rows), dtype=bool)
+    keep[matched[same]] = False
+    return rows.assign(task_id=found)[keep]
+
+
+def _task_keys(rows: pd.DataFrame) -> pd.DataFrame:
+    return rows[_TASK_KEY].reset_index(drop=True).astype(
+        {c: "datetime64[ns]" if c == "started_at" else object for c in _TASK_KEY})
+
+
+def _finish_restore(index: dict, frame: pd.DataFrame, pairs: pd.DataFrame, source, watermark):
+    """Restore the filter index of a cold-started dataset, then catch up on the rows changed since its cache."""
+    try:
+        with mock_data.ingest_paused():
+            # Any ingestion meanwhile swapped the mapped frame for a copy holding rows the pairs lack.
+            index["filters"] = (FilterIndex.from_pairs(pairs) if index["frame"] is frame
+                                else FilterIndex.from_frame(mock_data.index_rows(index)))
+        caught_up = 0
+        if source is not None and index is mock_data.base_index():
+            base = mock_data.index_rows(index, columns=TASK_COLUMNS)
+            if watermark:
+                # Tasks cached in progress may have completed at any time since they started.
+                started = base.loc[base["completed_at"].isna(), "started_at"].min()
+                rows = source.fetch_since(watermark, None if pd.isna(started) else started)
+            else:
+                rows = source.fetch("All dates", [], [])
+            rows = _catch_up_events(rows, base)
+            if len(rows):
+                mock_data.ingest_task_events(rows)
+                save_base_cache()
+            caught_up = len(rows)
+        _BASE_CACHE["caught_up"] = caught_up
+    except Exception as exc:
+        _LOGGER.exception("base cache restore failed")
+        _BASE_CACHE["last_error"] = repr(exc)
+
+
+def cold_start(source=None, wait: bool = False) -> dict:
+    """Install the base dataset from BASE_CACHE_DIR at startup, or build it and write the cache.
+
+    A cache written for the same ``source`` (default: the mock generator, on the same
+    day) and dataset settings is memory-mapped and installed with its row indexes in
+    milliseconds. A background thread then restores the filter index (option lists are
+    scanned until it is back) and catches up on the rows ``source`` added, completed or
+    still has in progress since the cache was written (see _catch_up_events). Without a
+    usable cache the dataset is loaded in full, installed and cached. Runs once per
+    process; ``wait`` blocks until the background work is done. Does nothing when
+    SNAPSHOT_DIR shares the dataset instead.
+    """
+    if not BASE_CACHE_DIR or SNAPSHOT_DIR:
+        return base_cache_status()
+    with _BASE_CACHE_LOCK:
+        if _BASE_CACHE["fingerprint"] is None:
+            t0 = time.perf_counter()
+            fingerprint = _base_fingerprint(source)
+            found = None if mock_data.base_installed() else read_cache(BASE_CACHE_DIR, _CACHE_NAMES, fingerprint)
+            _BASE_CACHE["fingerprint"] = fingerprint
+            try:
+                if found is None:
+                    if source is not None and not mock_data.base_installed():
+                        mock_data.install_base_df(source.fetch("All dates", [], []), warm=False)
+                    save_base_cache()  # builds the mock dataset when nothing is installed yet
+                    _BASE_CACHE.update(restored=False, watermark=None)
+                else:
+                    header, frames = found
+                    index = _restored_index(frames["base"])
+                    mock_data.install_base_df(index["frame"], warm=False, index=index, mapped=True)
+                    thread = threading.Thread(
+                        target=_finish_restore, name="base-cache-restore", daemon=True,
+                        args=(index, index["frame"], frames["base-filters"], source, header["watermark"]),
+                    )
+                    _BASE_CACHE.update(restored=True, watermark=header["watermark"], thread=thread)
+                    thread.start()
+            except Exception:
+                _BASE_CACHE["fingerprint"] = None
+                raise
+            _BASE_CACHE["seconds"] = time.perf_counter() - t0
+        thread = _BASE_CACHE["thread"]
+    if wait and thread is not None:
+        thread.join()
+    return base_cache_status()
+
+
+def save_base_cache() -> bool:
+    """Write the base dataset and its indexes to BASE_CACHE_DIR for the next cold_start.
+
+    Does nothing until cold_start has fingerprinted the cache, or while a restore is
+    still rebuilding the filter index (the files on disk are current then).
+    """
+    fingerprint = _BASE_CACHE["fingerprint"]
+    if not BASE_CACHE_DIR or fingerprint is None:
+        return False
+    with mock_data.ingest_paused():
+        index = mock_data.base_index()
+        if index["filters"] is None:
+            return False
+        mock_data.fold_index(index, force=True)
+        completed = index["frame"]["completed_at"].max()
+        write_cache(BASE_CACHE_DIR, _cache_frames(index), {
+            "fingerprint": fingerprint,
+            "rows": len(index["frame"]),
+            "watermark": None if pd.isna(completed) else completed.isoformat(),
+            "written_at": pd.Timestamp.now().isoformat(),
+        })
+    _BASE_CACHE["saved"] = pd.Timestamp.now()
+    return True
+
+
+def base_cache_status() -> dict:
+    thread = _BASE_CACHE["thread"]
+    return dict({k: v for k, v in _BASE_CACHE.items() if k != "thread"}, restoring=thread is not None and thread.is_alive())
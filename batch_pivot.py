@@ -0,0 +1,86 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pandas as pd
+
+import mock_data
+from settings import PIVOT_WORKERS
+
+# Task frames of other stations by name; None always means this app's own base dataset.
+_STATIONS = {}
+_STATIONS_LOCK = threading.Lock()
+# Station frames handed to each pool process by its initializer, indexed on first use there.
+_WORKER_INDEXES = {}
+
+
+def register_station(name: str, df: pd.DataFrame):
+    """Register (or replace) the task rows of station ``name``; ``df`` has the base dataset's columns."""
+    with _STATIONS_LOCK:
+        _STATIONS[name] = {"frame": df, "index": None}
+
+
+def stations() -> list:
+    with _STATIONS_LOCK:
+        return sorted(_STATIONS)
+
+
+def _station_index(name) -> dict:
+    if name is None:
+        return mock_data.base_index()
+    with _STATIONS_LOCK:
+        entry = _STATIONS[name]
+        if entry["index"] is None:
+            entry["index"] = mock_data.build_base_index(entry["frame"], filters=False)
+        return entry["index"]
+
+
+def _station_frame(name) -> pd.DataFrame:
+    return mock_data.base_rows() if name is None else _station_index(name)["frame"]
+
+
+def _normalized(spec) -> tuple:
+    station, tab, date_choice, aircraft_list, flight_list = spec
+    return station, tab, date_choice, list(aircraft_list or []), list(flight_list or [])
+
+
+def _pivot_in_thread(spec) -> pd.DataFrame:
+    station, tab, date_choice, aircraft_list, flight_list = spec
+    if station is None:
+        return mock_data.pivot_table(tab, date_choice, aircraft_list, flight_list)
+    rows = mock_data.filtered_rows(_station_index(station), date_choice, aircraft_list, flight_list)
+    return mock_data.pivot_frame(rows, tab)
+
+
+def _init_worker(frames: dict):
+    _WORKER_INDEXES.clear()
+    _WORKER_INDEXES.update(frames)
+
+
+def _pivot_in_process(spec) -> pd.DataFrame:
+    station, tab, date_choice, aircraft_list, flight_list = spec
+    index = _WORKER_INDEXES[station]
+    if isinstance(index, pd.DataFrame):
+        index = _WORKER_INDEXES[station] = mock_data.build_base_index(index, filters=False)
+    rows = mock_data.filtered_rows(index, date_choice, aircraft_list, flight_list)
+    return mock_data.pivot_frame(rows, tab)
+
+
+def pivot_batch(specs, workers: int = None, processes: bool = False) -> list:
+    """Boards for many ``(station, tab, date_choice, aircraft_list, flight_list)`` specs, in order.
+
+    Threads share the process's indexes and pivot cache; their speedup depends on how
+    much of the pivot runs outside the GIL. Processes get every referenced station
+    frame once at start-up and scale across cores, which pays off for larger batches.
+    """
+    specs = [_normalized(s) for s in specs]
+    workers = max(1, min(workers or PIVOT_WORKERS or os.cpu_count() or 1, len(specs) or 1))
+    if workers == 1:
+        return [_pivot_in_thread(s) for s in specs]
+    if not processes:
+        with ThreadPoolExecutor(workers, thread_name_prefix="pivot-batch") as pool:
+            return list(pool.map(_pivot_in_thread, specs))
+
+    frames = {name: _station_frame(name) for name in {s[0] for s in specs}}
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(frames,)) as pool:
+        return list(pool.map(_pivot_in_process, specs))
@@ -0,0 +1,746 @@
+import argparse
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import base_cache
+import mock_data
+import utility
+from utility import render_table_html
+
+SUITE_FLIGHTS = (16, 1_000, 10_000, 100_000)
+SUITE_SELECTIVITY = (1.0, 0.1, 0.01)
+SUITE_SEED = 0
+
+
+def _timed(fn, *args, repeat=3, **kwargs):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn(*args, **kwargs)
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def _use_base(flights: int, seed: int = 0):
+    df = mock_data.derive_task_columns(mock_data.generate_task_rows(flights, seed=seed))
+    mock_data._BASE_DF = df
+    mock_data.bump_data_version()
+    return df
+
+
+def _tiled_pivot(rows: int) -> pd.DataFrame:
+    board = mock_data.pivot_table("all", "All dates", [], [])
+    reps = -(-rows // len(board))
+    return pd.concat([board] * reps, ignore_index=True).iloc[:rows].reset_index(drop=True)
+
+
+def bench_generate(flight_counts=(10_000, 100_000), chunk_flights=25_000) -> list:
+    results = []
+    for flights in flight_counts:
+        gen_s, df = _timed(mock_data.generate_task_rows, flights, seed=0, repeat=1)
+        stream_s, rows = _timed(lambda: sum(len(c) for c in mock_data.iter_task_chunks(flights, chunk_flights, seed=0)),
+                                repeat=1)
+        derive_s, _ = _timed(mock_data.derive_task_columns, df, repeat=1)
+        results.append({
+            "stage": "generate",
+            "flights": flights,
+            "task_rows": len(df),
+            "seconds": gen_s,
+            "stream_seconds": stream_s,
+            "derive_seconds": derive_s,
+        })
+    return results
+
+
+def bench_render(sizes=(100, 1_000, 5_000, 20_000)) -> list:
+    results = []
+    for rows in sizes:
+        board = _tiled_pivot(rows)
+        cells = rows * sum(1 for c in board.columns if not c.endswith("_delay"))
+        seconds, html_out = _timed(render_table_html, board, reuse_rows=False)
+        results.append({
+            "stage": "render",
+            "rows": rows,
+            "cells": cells,
+            "seconds": seconds,
+            "us_per_cell": seconds / cells * 1e6,
+            "html_bytes": len(html_out.encode("utf-8")),
+        })
+    return results
+
+
+def bench_payload(sizes=(100, 1_000, 5_000)) -> list:
+    results = []
+    for rows in sizes:
+        board = _tiled_pivot(rows)
+        inline_bytes = len(render_table_html(board, reuse_rows=False).encode("utf-8"))
+        class_bytes = len(render_table_html(board, css_classes=True, reuse_rows=False).encode("utf-8"))
+        results.append({
+            "stage": "payload",
+            "rows": rows,
+            "inline_bytes": inline_bytes,
+            "class_bytes": class_bytes,
+            "ratio": inline_bytes / class_bytes,
+        })
+    return results
+
+
+def bench_window(sizes=(1_000, 20_000), page_size=50) -> list:
+    results = []
+    for rows in sizes:
+        board = _tiled_pivot(rows)
+        full_s, _ = _timed(render_table_html, board, css_classes=True, reuse_rows=False)
+        page_s, page_html = _timed(lambda: render_table_html(board.iloc[:page_size], css_classes=True, reuse_rows=False))
+        results.append({
+            "stage": "window",
+            "rows": rows,
+            "full_seconds": full_s,
+            "seconds": page_s,
+            "html_bytes": len(page_html.encode("utf-8")),
+        })
+    return results
+
+
+def bench_row_reuse(sizes=(1_000, 5_000), changed=1) -> list:
+    """Re-render a board after ``changed`` rows changed, with and without the shared row cache."""
+    results = []
+    for rows in sizes:
+        board = _tiled_pivot(rows)
+        col = next(c for c in board.columns if not c.endswith("_delay"))
+        utility.clear_row_cache()
+        render_table_html(board, css_classes=True)
+        board.loc[board.index[:changed], col] = "changed"
+        cold_s, cold = _timed(render_table_html, board, css_classes=True, reuse_rows=False, repeat=1)
+        warm_s, warm = _timed(render_table_html, board, css_classes=True, repeat=1)
+        results.append({
+            "stage": "row_reuse",
+            "rows": rows,
+            "changed": changed,
+            "render_seconds": cold_s,
+            "seconds": warm_s,
+            "speedup": cold_s / warm_s,
+            "equal": cold == warm,
+            "cache": utility.row_cache_stats(),
+        })
+    return results
+
+
+def bench_memory(flight_counts=(10_000, 100_000)) -> list:
+    """Base dataset bytes in expanded vs compact storage, and pivot time on each."""
+    results = []
+    for flights in flight_counts:
+        base = mock_data.derive_task_columns(mock_data.generate_task_rows(flights, seed=0))
+        totals = mock_data.memory_report(base).loc["total"]
+        compact = mock_data.compact_task_frame(base)
+        timings = {}
+        for name, frame in (("expanded", base), ("compact", compact)):
+            mock_data._BASE_DF = frame
+            mock_data.bump_data_version()
+            mock_data.base_index()
+            timings[name] = _timed(mock_data._compute_pivot, "all", "All dates", [], [], repeat=1)
+        results.append({
+            "stage": "memory",
+            "flights": flights,
+            "task_rows": len(base),
+            "expanded_bytes": int(totals["expanded_bytes"]),
+            "compact_bytes": int(totals["compact_bytes"]),
+            "saved": float(totals["saved"]),
+            "expanded_pivot_seconds": timings["expanded"][0],
+            "seconds": timings["compact"][0],
+            "equal": timings["expanded"][1].equals(timings["compact"][1]),
+        })
+    return results
+
+
+def bench_snapshot(flight_counts=(10_000, 100_000), directory=None) -> list:
+    """Worker startup: derive the dataset in-process vs map a published shared snapshot."""
+    import tempfile
+    import snapshot
+
+    results = []
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        for flights in flight_counts:
+            build_s, base = _timed(lambda: mock_data.derive_task_columns(mock_data.generate_task_rows(flights, seed=0)),
+                                   repeat=1)
+            publish_s, generation = _timed(snapshot.publish_snapshot, base, tmp, repeat=1)
+            map_s, (_, mapped) = _timed(snapshot.read_snapshot, tmp, generation)
+            results.append({
+                "stage": "snapshot",
+                "flights": flights,
+                "task_rows": len(base),
+                "build_seconds": build_s,
+                "publish_seconds": publish_s,
+                "seconds": map_s,
+                "equal": mapped.equals(base),
+            })
+    return results
+
+
+def _restart_base():
+    """Forget the base dataset, its indexes and the base cache state, as a newly started process."""
+    mock_data._BASE_DF = mock_data._BASE_INDEX = None
+    base_cache._BASE_CACHE.update(fingerprint=None, restored=None, seconds=None, watermark=None, caught_up=None,
+                                  saved=None, last_error=None, thread=None)
+    mock_data.bump_data_version()
+
+
+def bench_cold_start(flight_counts=(2_000, 20_000), newer=0.02, directory=None) -> list:
+    """Process start on a SQLite source: full fetch, derivation and indexing vs restoring the base cache.
+
+    A ``newer`` share of the task rows is added to the table after the cache is written;
+    ``ready_seconds`` includes catching up on them and restoring the filter index.
+    """
+    import tempfile
+    from data_source import SqlTaskSource, dispose_engines, write_tasks
+
+    results = []
+    cache_dir = base_cache.BASE_CACHE_DIR
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        try:
+            for flights in flight_counts:
+                rows = mock_data.generate_task_rows(flights, seed=0)
+                cut = rows["completed_at"].quantile(1 - newer)
+                url = f"sqlite:///{tmp}/tasks-{flights}.db"
+                write_tasks(rows[rows["completed_at"] <= cut], url)
+                source = SqlTaskSource(url)
+                base_cache.BASE_CACHE_DIR = f"{tmp}/cache-{flights}"
+
+                _restart_base()
+                build_s, _ = _timed(base_cache.cold_start, source, repeat=1)
+                write_tasks(rows[rows["completed_at"] > cut], url, if_exists="append")
+                _restart_base()
+                restore_s, _ = _timed(base_cache.cold_start, source, repeat=1)
+                wait_s, status = _timed(base_cache.cold_start, source, wait=True, repeat=1)
+                expected = mock_data.pivot_frame(source.fetch("All dates", [], []), "all")
+                results.append({
+                    "stage": "cold_start",
+                    "flights": flights,
+                    "task_rows": len(rows),
+                    "caught_up": status["caught_up"],
+                    "build_seconds": build_s,
+                    "seconds": restore_s,
+                    "ready_seconds": restore_s + wait_s,
+                    "speedup": build_s / restore_s,
+                    "equal": mock_data.pivot_table("all", "All dates", [], []).equals(expected),
+                })
+        finally:
+            base_cache.BASE_CACHE_DIR = cache_dir
+            _restart_base()
+            dispose_engines()
+    return results
+
+
+def bench_batch(flights=10_000, stations=4, worker_counts=(1, 2, 4)) -> list:
+    """Multi-station batch pivots on thread and process pools; speedup is against one worker."""
+    import os
+    import batch_pivot
+
+    names = [f"ST{i}" for i in range(stations)]
+    for i, name in enumerate(names):
+        batch_pivot.register_station(name, mock_data.derive_task_columns(mock_data.generate_task_rows(flights, seed=i)))
+    specs = [(name, tab, date_choice, [], []) for name in names
+             for tab in ("all", "departure", "arrival") for date_choice in ("All dates", "Today")]
+    batch_pivot.pivot_batch(specs[:1], workers=1)  # index every station outside the timings
+    for name in names:
+        batch_pivot._station_index(name)
+
+    serial_s, expected = _timed(batch_pivot.pivot_batch, specs, workers=1, repeat=1)
+    results = []
+    for processes in (False, True):
+        for workers in worker_counts:
+            seconds, boards = _timed(batch_pivot.pivot_batch, specs, workers=workers, processes=processes, repeat=1)
+            results.append({
+                "stage": "batch",
+                "cpus": os.cpu_count(),
+                "specs": len(specs),
+                "task_rows": sum(len(batch_pivot._station_frame(name)) for name in names),
+                "pool": "process" if processes else "thread",
+                "workers": workers,
+                "serial_seconds": serial_s,
+                "seconds": seconds,
+                "speedup": serial_s / seconds,
+                "equal": all(a.equals(b) for a, b in zip(expected, boards)),
+            })
+    return results
+
+
+def _history_chunks(flights: int, days: int, now: pd.Timestamp):
+    """One day's schedule per chunk, replayed for ``days`` days with fresh task timings."""
+    schedule = mock_data.generate_task_rows(flights, seed=0, now=now)
+    for day in range(days):
+        rows = mock_data.generate_task_rows(flights, seed=day + 1, now=now - pd.Timedelta(days=day))
+        rows[mock_data.KEY_COLS + ["task_name"]] = schedule[mock_data.KEY_COLS + ["task_name"]].to_numpy()
+        yield rows
+
+
+def bench_streaming(flights=5_000, day_counts=(5, 20)) -> list:
+    """Historical board over ``days`` of one schedule: whole-frame pivot vs folding one chunk per day."""
+    now = pd.Timestamp("today").normalize() + pd.Timedelta(hours=12)
+    results = []
+    for days in day_counts:
+        def whole():
+            rows = pd.concat(_history_chunks(flights, days, now), ignore_index=True)
+            return mock_data.pivot_frame(mock_data.derive_task_columns(rows), "all")
+
+        def streamed():
+            return mock_data.pivot_chunks(_history_chunks(flights, days, now), "all")
+
+        whole_s, whole_peak, expected = _measured(whole)
+        seconds, peak, board = _measured(streamed)
+        results.append({
+            "stage": "streaming",
+            "flights": flights,
+            "days": days,
+            "task_rows": flights * days * len(mock_data._TASK_SEQUENCE),
+            "whole_seconds": whole_s,
+            "whole_peak_bytes": whole_peak,
+            "seconds": seconds,
+            "peak_bytes": peak,
+            "equal": expected.equals(board),
+        })
+    return results
+
+
+def _pivot_table_reference(selected_table: str, date_choice: str, aircraft_list: list,
+                           flight_list: list) -> pd.DataFrame:
+    """Original two-pivot implementation of pivot_table, kept as the equality baseline for pivot_frame."""
+    base = mock_data._get_base_df()
+    dd = mock_data._apply_filters(base, date_choice, aircraft_list or [], flight_list or [])
+
+    key_cols = ["airfcraft_meridian", "flight_number_meridian"]
+
+    if selected_table == "departure":
+        keep = mock_data.TASKS_DEPARTURE
+        delay_prefix = "Departure_"
+        ddf = dd[dd["task_name"].isin(keep)].copy()
+
+    elif selected_table == "arrival":
+        keep = mock_data.TASKS_ARRIVAL
+        delay_prefix = "Arrival_"
+        ddf = dd[dd["task_name"].isin(keep)].copy()
+
+    else:
+        keep = list(set(mock_data.TASKS_ARRIVAL + mock_data.TASKS_DEPARTURE))
+        delay_prefix = ""
+        ddf = dd.copy()
+
+    dur = ddf.pivot_table(
+        index=key_cols,
+        columns="task_name",
+        values="duration_text",
+        aggfunc="max"
+    ).reset_index()
+
+    if selected_table == "arrival":
+        times_df = ddf.groupby(key_cols, as_index=False)["arrival_fact_meridian"].first()
+        times_df["Time of Arrival"] = times_df["arrival_fact_meridian"].dt.strftime("%H:%M")
+        times_df = times_df.drop(columns=["arrival_fact_meridian"])
+        merged = dur.merge(times_df, on=key_cols, how="left")
+
+    elif selected_table == "departure":
+        times_df = ddf.groupby(key_cols, as_index=False)["departure_fact_meridian"].first()
+        times_df["Time of Departure"] = times_df["departure_fact_meridian"].dt.strftime("%H:%M")
+        times_df = times_df.drop(columns=["departure_fact_meridian"])
+        merged = dur.merge(times_df, on=key_cols, how="left")
+
+    else:
+        times_df = (
+            ddf.groupby(key_cols, as_index=False)
+            .agg(arrival_fact_meridian=("arrival_fact_meridian", "first"),
+                 departure_fact_meridian=("departure_fact_meridian", "first"))
+        )
+        times_df["Time of Arrival"] = times_df["arrival_fact_meridian"].dt.strftime("%H:%M")
+        times_df["Time of Departure"] = times_df["departure_fact_meridian"].dt.strftime("%H:%M")
+        times_df = times_df.drop(columns=["arrival_fact_meridian", "departure_fact_meridian"])
+        merged = dur.merge(times_df, on=key_cols, how="left")
+
+    flg = ddf.pivot_table(
+        index=key_cols,
+        columns="task_name",
+        values="delay_flag",
+        aggfunc="max"
+    ).reset_index()
+
+    if delay_prefix:
+        flg = flg.rename(columns={c: f"{delay_prefix}{c}_delay" for c in flg.columns if c not in key_cols})
+    else:
+        flg = flg.rename(columns={c: f"{c}_delay" for c in flg.columns if c not in key_cols})
+
+    merged = merged.merge(flg, on=key_cols, how="left")
+
+    merged = merged.rename(columns={
+        "airfcraft_meridian": "Aircraft number",
+        "flight_number_meridian": "Flight number",
+    })
+
+    first_cols = [c for c in ["Aircraft number", "Flight number"] if c in merged.columns]
+
+    if selected_table == "all":
+
+        if "Time of Arrival" in merged.columns:
+            first_cols += ["Time of Arrival"]
+
+        ordered_tasks = mock_data.TASKS_ARRIVAL + mock_data.TASKS_DEPARTURE
+        seen = set()
+        task_cols = []
+        for t in ordered_tasks:
+            if t in merged.columns and t not in seen:
+                task_cols.append(t)
+                seen.add(t)
+
+        tod_injected = False
+        if "Time of Departure" in merged.columns:
+            if "Refueling" in task_cols:
+                ref_idx = task_cols.index("Refueling") + 1
+                task_cols.insert(ref_idx, "Time of Departure")
+                tod_injected = True
+            else:
+
+                first_cols += ["Time of Departure"]
+
+        ordered_delays = [f"{t}_delay" for t in ordered_tasks]
+        seen_d = set()
+        delay_cols = []
+        for d in ordered_delays:
+            if d in merged.columns and d not in seen_d:
+                delay_cols.append(d)
+                seen_d.add(d)
+
+        final_cols = first_cols + task_cols + delay_cols
+
+    elif selected_table == "arrival":
+        task_cols = [t for t in mock_data.TASKS_ARRIVAL if t in merged.columns]
+        delay_cols = [f"Arrival_{t}_delay" for t in mock_data.TASKS_ARRIVAL if f"Arrival_{t}_delay" in merged.columns]
+        if "Time of Arrival" in merged.columns:
+            first_cols += ["Time of Arrival"]
+        final_cols = first_cols + task_cols + delay_cols
+
+    else:
+        task_cols = [t for t in mock_data.TASKS_DEPARTURE if t in merged.columns]
+        delay_cols = [f"Departure_{t}_delay" for t in mock_data.TASKS_DEPARTURE if f"Departure_{t}_delay" in merged.columns]
+        if "Time of Departure" in merged.columns:
+            first_cols += ["Time of Departure"]
+        final_cols = first_cols + task_cols + delay_cols
+
+    keep_set = set(final_cols)
+    merged = merged[[c for c in merged.columns if c in keep_set]]
+    merged = merged[final_cols]
+
+    for col in final_cols:
+        if col in merged.columns and col.endswith("_delay"):
+            merged[col] = merged[col].fillna(0).astype(int)
+
+    base_info = {"Aircraft number", "Flight number", "Time of Arrival", "Time of Departure"}
+    for col in final_cols:
+        if col in merged.columns and not col.endswith("_delay") and col not in base_info:
+            merged[col] = merged[col].fillna("")
+
+    return merged
+
+
+def bench_pivot(flight_counts=(1_000, 10_000), tabs=("all", "departure", "arrival")) -> list:
+    results = []
+    for flights in flight_counts:
+        base = _use_base(flights)
+        for tab in tabs:
+            ref_s, ref = _timed(_pivot_table_reference, tab, "All dates", [], [])
+            new_s, new = _timed(mock_data._compute_pivot, tab, "All dates", [], [])
+            results.append({
+                "stage": "pivot",
+                "flights": flights,
+                "task_rows": len(base),
+                "tab": tab,
+                "reference_seconds": ref_s,
+                "seconds": new_s,
+                "speedup": ref_s / new_s,
+                "equal": ref.equals(new),
+            })
+    return results
+
+
+def bench_filters(flights=6_000) -> list:
+    base = _use_base(flights)
+    mock_data.base_index()
+    tails = base["airfcraft_meridian"].drop_duplicates().head(20).tolist()
+    flts = base["flight_number_meridian"].drop_duplicates().head(20).tolist()
+    cases = {
+        "none": ("All dates", [], []),
+        "today": ("Today", [], []),
+        "aircraft": ("All dates", tails, []),
+        "today+aircraft+flights": ("Today", tails, flts),
+        "last 7 days 06-18": (mock_data.date_range(pd.Timestamp("today") - pd.Timedelta(days=6), pd.Timestamp("today"),
+                                                   shift=(6, 18)), [], []),
+    }
+    results = []
+    for name, (date_choice, aircraft, flights_sel) in cases.items():
+        scan_s, scanned = _timed(mock_data._scan_filters, base, date_choice, aircraft, flights_sel)
+        idx_s, indexed = _timed(mock_data._apply_filters, base, date_choice, aircraft, flights_sel)
+        results.append({
+            "stage": "filter",
+            "task_rows": len(base),
+            "case": name,
+            "matched_rows": len(indexed),
+            "scan_seconds": scan_s,
+            "seconds": idx_s,
+            "speedup": scan_s / idx_s,
+            "equal": scanned.equals(indexed),
+        })
+    return results
+
+
+def _matches_rebuild(tabs) -> bool:
+    """Whether boards, row lookups and option lists of the ingested base equal those of a fresh rebuild."""
+    rows = mock_data.load_base_df()
+    live, fresh = mock_data.base_index(), mock_data.build_base_index(rows.copy())
+    today = pd.Timestamp("today").normalize()
+    aircraft, flight = rows["airfcraft_meridian"].iloc[-1], rows["flight_number_meridian"].iloc[-1]
+    filters = [("All dates", [], []), ("Today", [], []), ("Yesterday", [], []),
+               (mock_data.date_range(today - pd.Timedelta(days=2), today, shift=(22, 6)), [], []),
+               ("All dates", [aircraft], []), ("Today", [], [flight])]
+    return (
+        all(mock_data.filtered_rows(live, *f).equals(mock_data.filtered_rows(fresh, *f)) for f in filters)
+        and all(mock_data.pivot_table(tab, d, [], []).equals(mock_data.pivot_frame(mock_data.filtered_rows(fresh, d, [], []), tab))
+                for tab in tabs for d in ("All dates", "Today"))
+        and mock_data.distinct_flights("Today", []) == fresh["filters"].flights(today, [])
+        and mock_data.distinct_aircraft("All dates", [flight]) == fresh["filters"].aircraft(mock_data.ALL_DAYS, [flight])
+    )
+
+
+def bench_ingest(flights=10_000, batch_sizes=(1, 10, 100), compact=False) -> list:
+    """Ingest batches of updates, time moves and appends into a warm base vs rebuilding its boards.
+
+    ``equal`` checks the ingested state against a fresh rebuild, before and after
+    the appended rows and moved times are folded into the base frame and time orders.
+    ``compact`` ingests into the COMPACT_DATASET storage instead.
+    """
+    results = []
+    tabs = ("all", "departure", "arrival")
+    for batch in batch_sizes:
+        base = _use_base(flights)
+        if compact:
+            base = mock_data._BASE_DF = mock_data.compact_task_frame(base)
+            mock_data.bump_data_version()
+        t0 = time.perf_counter()
+        for tab in tabs:
+            for date_choice in ("All dates", "Today"):
+                mock_data.pivot_table(tab, date_choice, [], [])
+        rebuild_s = time.perf_counter() - t0
+        ids = base.index[:batch]
+        batches = {
+            "update": [{"task_id": i, "completed_at": base.at[i, "completed_at"] + pd.Timedelta(minutes=3)} for i in ids],
+            "move": [{"task_id": i, **{c: base.at[i, c] - pd.Timedelta(days=2) for c in mock_data.TIME_INDEX_COLUMNS}}
+                     for i in base.index[batch:2 * batch]],
+            "append": base.iloc[-batch:][mock_data.TASK_COLUMNS].assign(flight_number_meridian="NEW").to_dict("records"),
+        }
+        for kind, events in batches.items():
+            t0 = time.perf_counter()
+            mock_data.ingest_task_events(events)
+            results.append({
+                "stage": "ingest",
+                "kind": kind,
+                "compact": compact,
+                "task_rows": len(base),
+                "events": batch,
+                "rebuild_seconds": rebuild_s,
+                "seconds": time.perf_counter() - t0,
+            })
+        appended = len(base) + batch - 1
+        mock_data.ingest_task_events([{"task_id": appended, "started_at": base["started_at"].iloc[-1] - pd.Timedelta(minutes=30)}])
+        equal = _matches_rebuild(tabs)
+        with mock_data.ingest_paused():
+            mock_data.fold_index(mock_data.base_index(), force=True)
+        equal = equal and _matches_rebuild(tabs)
+        for record in results[-len(batches):]:
+            record["equal"] = equal
+    return results
+
+
+def bench_delay_analytics(flight_counts=(10_000, 100_000), batch=100) -> list:
+    """Delay cube build, one ingest batch and a cell query vs re-aggregating the raw rows."""
+    from delay_analytics import DelayCube
+
+    results = []
+    for flights in flight_counts:
+        rows = mock_data.generate_task_rows(flights, seed=0)
+        build_s, cube = _timed(DelayCube.from_frame, rows, mock_data.DELAY_THRESHOLD,
+                               mock_data.TASKS_ARRIVAL, mock_data.TASKS_DEPARTURE, repeat=1)
+        update_s, _ = _timed(cube.add_rows, rows.iloc[:batch], repeat=1)
+        query_s, _ = _timed(cube.stats, task="Refueling", hour=12, repeat=100)
+
+        def rescan():
+            hit = rows[(rows["task_name"] == "Refueling") & (rows["started_at"].dt.hour == 12)]
+            overrun = hit["actual_duration_minutes"] - hit["estimated_duration_minutes"]
+            return overrun.quantile([0.5, 0.95]), mock_data._delay_flags(hit).mean()
+
+        rescan_s, _ = _timed(rescan)
+        results.append({
+            "stage": "delay_analytics",
+            "task_rows": len(rows),
+            "build_seconds": build_s,
+            "update_seconds": update_s,
+            "update_rows": batch,
+            "query_seconds": query_s,
+            "rescan_seconds": rescan_s,
+        })
+    return results
+
+
+def _measured(fn, *args, reset=None, **kwargs):
+    """Wall time of an untraced call and peak traced allocation of a second call."""
+    if reset:
+        reset()
+    t0 = time.perf_counter()
+    result = fn(*args, **kwargs)
+    seconds = time.perf_counter() - t0
+    if reset:
+        reset()
+    tracemalloc.start()
+    try:
+        fn(*args, **kwargs)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return seconds, peak, result
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=Path(__file__).parent, timeout=10)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _suite_selection(base: pd.DataFrame, selectivity: float) -> list:
+    if selectivity >= 1.0:
+        return []
+    tails = base["airfcraft_meridian"].drop_duplicates().sort_values()
+    return tails.head(max(1, int(round(len(tails) * selectivity)))).tolist()
+
+
+def run_suite(flight_counts=SUITE_FLIGHTS, selectivities=SUITE_SELECTIVITY, date_choice="All dates",
+              tab="all", seed=SUITE_SEED) -> dict:
+    """Per-stage wall time, peak memory and HTML bytes across dataset size and filter selectivity."""
+    now = pd.Timestamp("today").normalize() + pd.Timedelta(hours=12)
+    records = []
+    for flights in flight_counts:
+        def make_base():
+            return mock_data.derive_task_columns(mock_data.generate_task_rows(flights, seed=seed, now=now))
+
+        seconds, peak, base = _measured(make_base)
+        mock_data._BASE_DF = base
+        mock_data.bump_data_version()
+        common = {"flights": flights, "task_rows": len(base)}
+        records.append(dict(common, stage="make_base_df", selectivity=1.0, seconds=seconds, peak_bytes=peak))
+        seconds, peak, _ = _measured(mock_data.build_base_index, base)
+        records.append(dict(common, stage="base_index", selectivity=1.0, seconds=seconds, peak_bytes=peak))
+        mock_data.base_index()
+
+        for selectivity in selectivities:
+            aircraft = _suite_selection(base, selectivity)
+            row = dict(common, selectivity=selectivity, aircraft_selected=len(aircraft))
+            stages = [
+                ("apply_filters", mock_data._apply_filters, (base, date_choice, aircraft, []), None),
+                ("distinct_aircraft", mock_data.distinct_aircraft, (date_choice, []), None),
+                ("distinct_flights", mock_data.distinct_flights, (date_choice, aircraft), None),
+                ("pivot_table", mock_data.pivot_table, (tab, date_choice, aircraft, []), mock_data.clear_pivot_cache),
+                ("pivot_table_cached", mock_data.pivot_table, (tab, date_choice, aircraft, []), None),
+            ]
+            board = None
+            for stage, fn, args, reset in stages:
+                seconds, peak, result = _measured(fn, *args, reset=reset)
+                records.append(dict(row, stage=stage, seconds=seconds, peak_bytes=peak))
+                if stage == "pivot_table":
+                    board = result
+            seconds, peak, html_out = _measured(render_table_html, board, css_classes=True, reuse_rows=False)
+            records.append(dict(row, stage="render_table_html", seconds=seconds, peak_bytes=peak,
+                                board_rows=len(board), html_bytes=len(html_out.encode("utf-8"))))
+
+    return {
+        "commit": _git_commit(),
+        "timestamp": pd.Timestamp.now(tz="UTC").isoformat(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "seed": seed,
+        "date_choice": date_choice,
+        "tab": tab,
+        "records": records,
+    }
+
+
+def compare_suites(current: dict, baseline: dict) -> list:
+    """Time ratios (current / baseline) for stages present in both result files."""
+    def keyed(suite):
+        return {(r["stage"], r["flights"], r["selectivity"]): r for r in suite["records"]}
+
+    base = keyed(baseline)
+    rows = []
+    for key, rec in keyed(current).items():
+        if key in base and base[key]["seconds"] > 0:
+            rows.append({
+                "stage": key[0], "flights": key[1], "selectivity": key[2],
+                "baseline_seconds": base[key]["seconds"], "seconds": rec["seconds"],
+                "ratio": rec["seconds"] / base[key]["seconds"],
+            })
+    return rows
+
+
+def _print_results(results: list):
+    for r in results:
+        print("  ".join(f"{k}={v:.6g}" if isinstance(v, float) else f"{k}={v}" for k, v in r.items()))
+
+
+def _micro_benchmarks():
+    _print_results(bench_generate())
+    _print_results(bench_render())
+    _print_results(bench_payload())
+    _print_results(bench_window())
+    _print_results(bench_row_reuse())
+    _print_results(bench_pivot())
+    _print_results(bench_memory())
+    _print_results(bench_snapshot())
+    _print_results(bench_cold_start())
+    _print_results(bench_batch())
+    _print_results(bench_streaming())
+    _print_results(bench_filters())
+    _print_results(bench_ingest())
+    _print_results(bench_ingest(compact=True))
+    _print_results(bench_delay_analytics())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless benchmarks for the task board pipeline.")
+    parser.add_argument("--flights", type=int, nargs="+", default=list(SUITE_FLIGHTS))
+    parser.add_argument("--selectivity", type=float, nargs="+", default=list(SUITE_SELECTIVITY))
+    parser.add_argument("--date", default="All dates", choices=["All dates", "Today", "Yesterday"])
+    parser.add_argument("--tab", default="all", choices=["all", "departure", "arrival"])
+    parser.add_argument("--seed", type=int, default=SUITE_SEED)
+    parser.add_argument("--out", type=Path, help="write results as JSON")
+    parser.add_argument("--baseline", type=Path, help="compare against a previous JSON result")
+    parser.add_argument("--micro", action="store_true", help="run the per-feature micro benchmarks instead")
+    args = parser.parse_args(argv)
+
+    if args.micro:
+        _micro_benchmarks()
+        return
+
+    suite = run_suite(args.flights, args.selectivity, args.date, args.tab, args.seed)
+    _print_results(suite["records"])
+    if args.out:
+        args.out.write_text(json.dumps(suite, indent=2))
+    if args.baseline:
+        _print_results(compare_suites(suite, json.loads(args.baseline.read_text())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import io
+import tempfile
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+EXPORT_BATCH_ROWS = 50_000
+EXPORT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+# Format -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    "csv": ("csv", "text/csv"),
+    "parquet": ("parquet", "application/vnd.apache.parquet"),
+    "xlsx": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+
+_EXPORT_CACHE = OrderedDict()
+_EXPORT_CACHE_STATS = {"hits": 0, "misses": 0, "evictions": 0, "bytes": 0}
+_EXPORT_CACHE_LOCK = threading.Lock()
+
+
+def export_cache_stats() -> dict:
+    with _EXPORT_CACHE_LOCK:
+        return dict(_EXPORT_CACHE_STATS, size=len(_EXPORT_CACHE))
+
+
+def clear_export_cache():
+    with _EXPORT_CACHE_LOCK:
+        _EXPORT_CACHE.clear()
+        for k in _EXPORT_CACHE_STATS:
+            _EXPORT_CACHE_STATS[k] = 0
+
+
+def _batches(df: pd.DataFrame, batch_rows: int):
+    for start in range(0, max(len(df), 1), batch_rows):
+        yield df.iloc[start:start + batch_rows]
+
+
+def iter_csv(df: pd.DataFrame, batch_rows: int = EXPORT_BATCH_ROWS):
+    """UTF-8 CSV of the board, one encoded chunk per row batch (header in the first)."""
+    for i, batch in enumerate(_batches(df, batch_rows)):
+        yield batch.to_csv(index=False, header=i == 0, lineterminator="\n").encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only stream that hands written bytes back out while keeping the file offset."""
+
+    def __init__(self):
+        self._chunks, self._pos = [], 0
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._chunks.append(bytes(b))
+        self._pos += len(b)
+        return len(b)
+
+    def tell(self):
+        return self._pos
+
+    def drain(self) -> bytes:
+        out, self._chunks = b"".join(self._chunks), []
+        return out
+
+
+def iter_parquet(df: pd.DataFrame, batch_rows: int = EXPORT_BATCH_ROWS):
+    """Parquet file of the board with one row group per batch, yielded as each group is written."""
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    sink = _ChunkSink()
+    with pq.ParquetWriter(sink, schema) as writer:
+        for batch in _batches(df, batch_rows):
+            writer.write_table(pa.Table.from_pandas(batch, schema=schema, preserve_index=False))
+            yield sink.drain()
+    yield sink.drain()
+
+
+def iter_xlsx(df: pd.DataFrame, batch_rows: int = EXPORT_BATCH_ROWS, chunk_bytes: int = 1 << 20):
+    """Excel workbook of the board; rows go to a write-only sheet batch by batch (needs openpyxl)."""
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Board")
+    ws.append(list(map(str, df.columns)))
+    for batch in _batches(df, batch_rows):
+        for row in batch.astype(object).where(batch.notna(), None).itertuples(index=False, name=None):
+            ws.append(row)
+    with tempfile.TemporaryFile() as fh:
+        wb.save(fh)
+        fh.seek(0)
+        while chunk := fh.read(chunk_bytes):
+            yield chunk
+
+
+_WRITERS = {"csv": iter_csv, "parquet": iter_parquet, "xlsx": iter_xlsx}
+
+
+def iter_export(df: pd.DataFrame, fmt: str, batch_rows: int = EXPORT_BATCH_ROWS):
+    """Byte chunks of ``df`` in ``fmt`` (one of EXPORT_FORMATS)."""
+    return _WRITERS[fmt](df, batch_rows)
+
+
+def write_export(df: pd.DataFrame, fmt: str, path, batch_rows: int = EXPORT_BATCH_ROWS) -> int:
+    """Stream the export to ``path`` without holding the whole file; returns the bytes written."""
+    written = 0
+    with open(path, "wb") as fh:
+        for chunk in iter_export(df, fmt, batch_rows):
+            written += fh.write(chunk)
+    return written
+
+
+def export_bytes(df: pd.DataFrame, fmt: str, key: tuple) -> bytes:
+    """The export of board ``df`` as bytes, cached under ``(fmt, key)``.
+
+    ``key`` must identify the board's filters and dataset version (``mock_data.pivot_cache_key``),
+    so every session downloading the same board shares one copy.
+    """
+    cache_key = (fmt, key)
+    with _EXPORT_CACHE_LOCK:
+        data = _EXPORT_CACHE.get(cache_key)
+        if data is not None:
+            _EXPORT_CACHE.move_to_end(cache_key)
+            _EXPORT_CACHE_STATS["hits"] += 1
+            return data
+        _EXPORT_CACHE_STATS["misses"] += 1
+
+    data = b"".join(iter_export(df, fmt))
+
+    with _EXPORT_CACHE_LOCK:
+        if len(data) <= EXPORT_CACHE_MAX_BYTES and cache_key not in _EXPORT_CACHE:
+            _EXPORT_CACHE[cache_key] = data
+            _EXPORT_CACHE_STATS["bytes"] += len(data)
+        while _EXPORT_CACHE_STATS["bytes"] > EXPORT_CACHE_MAX_BYTES and _EXPORT_CACHE:
+            _EXPORT_CACHE_STATS["bytes"] -= len(_EXPORT_CACHE.popitem(last=False)[1])
+            _EXPORT_CACHE_STATS["evictions"] += 1
+    return data
@@ -0,0 +1,145 @@
+import threading
+
+from settings import COLOR_NAVY, get_logo_data_uri, logo_mtime
+
+# Static page chrome, built once per process (and again only when logo.jpg changes)
+# instead of being re-formatted with the embedded logo on every rerun.
+
+CLOCK_SCRIPT = """
+<script>
+(function(){
+  function pad(n){return n.toString().padStart(2,'0');}
+  function tick(){
+    const d = new Date();
+    const s = pad(d.getDate())+'-'+pad(d.getMonth()+1)+'-'+d.getFullYear()
+            +' '+pad(d.getHours())+':'+pad(d.getMinutes())+':'+pad(d.getSeconds());
+    const el = window.parent.document.querySelector('.app-time #local-clock');
+    if(el) el.textContent = s;
+  }
+  tick();
+  setInterval(tick, 1000);
+})();
+</script>
+"""
+
+HIDE_CLOCK_IFRAME_CSS = """
+<style>
+iframe[title="streamlit.components.v1.html"]{
+  pointer-events:none !important; width:0 !important; height:0 !important;
+  position:absolute !important; left:-9999px !important; opacity:0 !important; z-index:-1 !important;
+}
+</style>
+"""
+
+_CHROME = {}
+_CHROME_LOCK = threading.Lock()
+
+
+def _login_html(logo_uri: str) -> str:
+    return f"""
+<style>
+  .ca-login-wrap{{
+    min-height: 40vh; display:flex; align-items:flex-start; justify-content:center;
+    padding:40px 16px;
+  }}
+  .ca-login{{
+    width:520px; border-radius:22px;
+    background:#0E1A30;
+    border:1px solid rgba(148,163,184,.18);
+    box-shadow: 0 35px 70px rgba(2,6,23,.45);
+    color:#E5E7EB; padding:28px 26px 22px;
+  }}
+  .ca-login .title{{
+    display:flex; flex-direction:column; align-items:center; gap:14px; margin:0 0 6px 0;
+  }}
+  .ca-login .title img{{height:56px;width:56px;border-radius:14px;}}
+  .ca-login .title h2{{margin:0; font-size:24px; font-weight:800; color:#fff; letter-spacing:.2px;}}
+  .ca-login [data-testid="stMarkdownContainer"] h1 a,
+  .ca-login [data-testid="stMarkdownContainer"] h2 a{{display:none!important;}}
+  .ca-login [data-testid="stForm"]{{background:transparent!important; padding:0!important; border:none!important;}}
+  .ca-login .field-label{{font-size:13px; color:#cbd5e1; margin:12px 2px 6px 2px; font-weight:600;}}
+  .ca-login .stTextInput > div > div{{
+    background:#ffffff !important;
+    border:1px solid #E2E8F0 !important;
+    border-radius:12px; padding:2px 12px;
+  }}
+  .ca-login input[type="text"],
+  .ca-login input[type="password"]{{
+    height:46px; background:#ffffff !important;
+    color:#0f172a !important;
+    border:none !important; box-shadow:none !important; border-radius:9px; font-size:15px;
+  }}
+  .ca-login input::placeholder{{ color:#64748b !important; opacity:1; }}
+  .ca-login input:-webkit-autofill{{
+    -webkit-box-shadow: 0 0 0px 1000px #ffffff inset !important;
+    -webkit-text-fill-color:#0f172a !important; caret-color:#0f172a !important;
+  }}
+  .ca-login .stButton > button{{
+    width:100%; height:48px; border-radius:12px;
+    background:#F43F5E !important; color:#fff !important; border:1px solid #F43F5E !important;
+    font-weight:800; letter-spacing:.2px; margin-top:10px; font-size:15px;
+  }}
+  .ca-login .stButton > button:hover{{ filter:brightness(1.06); }}
+  #MainMenu{{visibility:hidden;}}
+  header [data-testid="stToolbar"]{{display:none!important;}}
+  footer{{visibility:hidden;}}
+  div[data-testid="stStatusWidget"]{{display:none!important;}}
+</style>
+<div class="ca-login-wrap">
+  <div class="ca-login">
+    <div class="title">
+      <img src="{logo_uri}" />
+      <h2>Sign in to continue</h2>
+    </div>
+"""
+
+
+def _header_html(logo_uri: str) -> str:
+    return f"""
+<style>
+#MainMenu {{ visibility: hidden; }}
+header [data-testid="stToolbar"] {{ display: none; }}
+footer {{ visibility: hidden; }}
+h1.app-title {{ font-size: 28px !important; margin: 0 !important; font-weight: 700 !important; letter-spacing: .2px; }}
+div.app-time {{ font-size: 18px; font-weight: 600; letter-spacing: .5px; opacity: 0.95; }}
+.table-wrap {{ overflow:auto; border:1px solid #E5E7EB; border-radius:10px; max-height:92vh; }}
+table thead th {{
+  font-size: 13px !important; line-height: 1.25; vertical-align: bottom; white-space: normal; word-break: break-word;
+  position: sticky; top: 0; background:{COLOR_NAVY}; color:#FFFFFF; padding:8px; text-align:left;
+}}
+.tabs label {{
+  border: 1px solid #cbd5e1; padding: 8px 12px; margin-right: 8px; border-radius: 10px; background: #ffffff; color: #0f172a;
+  cursor: pointer; transition: all .15s ease;
+}}
+.tabs label:hover {{ border-color: {COLOR_NAVY}; }}
+.tabs label[data-checked="true"] {{ background: {COLOR_NAVY}; color: #FFFFFF; border-color: {COLOR_NAVY}; }}
+.tabs input[type="radio"] {{ display:none; }}
+.filter-label {{ font-size:13px; color:#475569; margin-bottom:6px; }}
+@media (prefers-color-scheme: dark) {{ .table-wrap {{ border-color: #1f2937; }} }}
+</style>
+<div style="display:flex;justify-content:space-between;align-items:center;background:{COLOR_NAVY};color:#FFFFFF;padding:12px 16px;border-radius:12px;margin-bottom:10px;">
+  <div style="display:flex;gap:12px;align-items:center;">
+    <img src="{logo_uri}" style="height:40px;width:auto;border-radius:6px;object-fit:contain;" />
+    <h1 class="app-title">Ground Handling Tasks (Powered by Diyorbek)</h1>
+  </div>
+  <div class="app-time"><span id="local-clock"></span></div>
+</div>
+"""
+
+
+def _chrome() -> dict:
+    mtime = logo_mtime()
+    with _CHROME_LOCK:
+        if _CHROME.get("mtime") != mtime:
+            logo_uri = get_logo_data_uri()
+            _CHROME.update(mtime=mtime, login=_login_html(logo_uri), header=_header_html(logo_uri))
+        return _CHROME
+
+
+def login_html() -> str:
+    """Login card styles and opening markup; the caller closes the two wrapper divs."""
+    return _chrome()["login"]
+
+
+def header_html() -> str:
+    return _chrome()["header"]
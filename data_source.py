@@ -0,0 +1,128 @@
+import threading
+
+import pandas as pd
+import pyarrow.parquet as pq
+import sqlalchemy as sa
+
+from mock_data import TASK_COLUMNS, derive_task_columns, empty_task_rows, time_windows
+
+TIME_COLUMNS = ["departure_fact_meridian", "arrival_fact_meridian", "started_at", "completed_at"]
+FETCH_CHUNK_ROWS = 50_000
+
+_ENGINES = {}
+_ENGINES_LOCK = threading.Lock()
+
+
+def get_engine(url: str) -> sa.engine.Engine:
+    """Process-wide pooled engine per database URL."""
+    with _ENGINES_LOCK:
+        engine = _ENGINES.get(url)
+        if engine is None:
+            kwargs = {"pool_pre_ping": True}
+            if not url.startswith("sqlite"):
+                kwargs.update(pool_size=5, max_overflow=10, pool_recycle=1800)
+            engine = sa.create_engine(url, **kwargs)
+            _ENGINES[url] = engine
+        return engine
+
+
+def dispose_engines():
+    with _ENGINES_LOCK:
+        for engine in _ENGINES.values():
+            engine.dispose()
+        _ENGINES.clear()
+
+
+class SqlTaskSource:
+    """Task rows read from a database table with the mock dataset's schema.
+
+    Date, aircraft and flight filters are pushed into the WHERE clause and rows are
+    streamed in ``chunk_rows`` batches. ``duration_text`` and ``delay_flag`` are
+    derived on read when the table does not store them.
+    """
+
+    def __init__(self, url: str, table: str = "ground_tasks", chunk_rows: int = FETCH_CHUNK_ROWS):
+        self.engine = get_engine(url)
+        self.chunk_rows = chunk_rows
+        names = sa.inspect(self.engine).get_columns(table)
+        self.table = sa.table(table, *[sa.column(c["name"]) for c in names])
+
+    def _where(self, date_choice: str, aircraft_list: list, flight_list: list) -> list:
+        c = self.table.c
+        clauses = []
+        windows = time_windows(date_choice)
+        if windows is not None:
+            clauses.append(sa.or_(*(
+                sa.or_(
+                    sa.and_(c.arrival_fact_meridian >= start, c.arrival_fact_meridian < end),
+                    sa.and_(c.departure_fact_meridian >= start, c.departure_fact_meridian < end),
+                )
+                for start, end in ((s.to_pydatetime(), e.to_pydatetime()) for s, e in windows)
+            )))
+        if aircraft_list:
+            clauses.append(c.airfcraft_meridian.in_(list(aircraft_list)))
+        if flight_list:
+            clauses.append(c.flight_number_meridian.in_(list(flight_list)))
+        return clauses
+
+    def fingerprint(self) -> str:
+        """Identifies the table read (URL without password, table name), e.g. for the base cache."""
+        return f"{self.engine.url.render_as_string(hide_password=True)}#{self.table.name}"
+
+    def _chunks(self, clauses: list):
+        cols = [self.table.c[n] for n in TASK_COLUMNS if n in self.table.c]
+        stmt = sa.select(*cols).where(*clauses)
+        with self.engine.connect() as conn:
+            conn = conn.execution_options(stream_results=True)
+            for chunk in pd.read_sql(stmt, conn, chunksize=self.chunk_rows, parse_dates=TIME_COLUMNS):
+                yield derive_task_columns(chunk)
+
+    @staticmethod
+    def _frame(chunks) -> pd.DataFrame:
+        chunks = list(chunks)
+        if not chunks:
+            return empty_task_rows()
+        return pd.concat(chunks, ignore_index=True)
+
+    def iter_chunks(self, date_choice: str, aircraft_list: list, flight_list: list):
+        return self._chunks(self._where(date_choice, aircraft_list, flight_list))
+
+    def fetch(self, date_choice: str, aircraft_list: list, flight_list: list) -> pd.DataFrame:
+        return self._frame(self.iter_chunks(date_choice, aircraft_list, flight_list))
+
+    def fetch_since(self, completed_at, started_at=None) -> pd.DataFrame:
+        """Task rows that may have changed since a base dataset completed up to ``completed_at`` was cached.
+
+        Those are rows completed at or after ``completed_at``, rows still in progress and,
+        with ``started_at``, rows started at or after it (the tasks cached in progress).
+        """
+        c = self.table.c
+        since = [c.completed_at >= pd.Timestamp(completed_at).to_pydatetime(), c.completed_at.is_(None)]
+        if started_at is not None:
+            since.append(c.started_at >= pd.Timestamp(started_at).to_pydatetime())
+        return self._frame(self._chunks([sa.or_(*since)]))
+
+    def distinct(self, column: str, date_choice: str, aircraft_list: list, flight_list: list) -> list:
+        col = self.table.c[column]
+        stmt = (
+            sa.select(col).distinct()
+            .where(col.is_not(None), *self._where(date_choice, aircraft_list, flight_list))
+            .order_by(col)
+        )
+        with self.engine.connect() as conn:
+            return [row[0] for row in conn.execute(stmt)]
+
+
+def write_tasks(df: pd.DataFrame, url: str, table: str = "ground_tasks", if_exists: str = "replace"):
+    """Write task rows to ``table``, e.g. to seed a local SQLite stand-in from the mock dataset."""
+    cols = [c for c in TASK_COLUMNS if c in df.columns]
+    with get_engine(url).begin() as conn:
+        df[cols].to_sql(table, conn, if_exists=if_exists, index=False, chunksize=FETCH_CHUNK_ROWS)
+
+
+def iter_parquet_chunks(path, chunk_rows: int = FETCH_CHUNK_ROWS):
+    """Task rows of a Parquet file in ``chunk_rows`` batches, e.g. for ``pivot_chunks``."""
+    pf = pq.ParquetFile(path)
+    columns = [c for c in TASK_COLUMNS + ["duration_text"] if c in pf.schema_arrow.names]
+    for batch in pf.iter_batches(batch_size=chunk_rows, columns=columns):
+        yield batch.to_pandas()
@@ -0,0 +1,191 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Overrun (actual - estimated minutes) histogram range; values outside land in the edge bins,
+# so percentiles saturate at these bounds.
+OVERRUN_MIN, OVERRUN_MAX = -60, 180
+_BINS = OVERRUN_MAX - OVERRUN_MIN + 1
+HOURS = 24
+VIEWS = (("task",), ("aircraft",), ("hour",), ("task", "hour"))
+STAT_COLUMNS = ["tasks", "delayed", "delay_rate", "p50_overrun", "p95_overrun", "mean_start_offset"]
+
+
+def _factorized(s: pd.Series):
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        s = s.astype(s.cat.categories.dtype)
+    return pd.factorize(s)
+
+
+def _accumulate(arr: np.ndarray, cell: tuple, values):
+    """``arr[cell] += values`` with repeated cells; large batches count with one bincount."""
+    if len(cell[0]) * 8 < arr.size:
+        np.add.at(arr, cell, values)
+        return
+    flat = np.ravel_multi_index(cell, arr.shape)
+    weights = np.broadcast_to(values, flat.shape).astype(float)
+    arr += np.bincount(flat, weights, minlength=arr.size).reshape(arr.shape).astype(arr.dtype)
+
+
+def _percentile(cum: np.ndarray, n: np.ndarray, q: float) -> np.ndarray:
+    """Smallest overrun whose cumulative count reaches ``q`` of the cell (numpy's inverted_cdf)."""
+    reached = cum >= (q * np.asarray(n))[..., None]
+    return np.where(n == 0, np.nan, reached.argmax(-1) + OVERRUN_MIN)
+
+
+class DelayCube:
+    """Delay rate, p50/p95 overrun and mean start offset per task, aircraft, hour and task x hour.
+
+    Every view keeps dense per-code arrays: an overrun-minute histogram, delayed counts and
+    start-offset sums. Adding or removing rows touches only their cells, and any cell's
+    statistics are read from a fixed number of bins regardless of how many rows it holds.
+    A task is delayed when ``actual > estimated * threshold``. Its start offset is minutes
+    from arrival for arrival-only tasks and from departure for departure-only tasks. Tasks
+    on both lists use whichever flight event is nearer.
+    """
+
+    def __init__(self, threshold: float, arrival_tasks, departure_tasks):
+        self.threshold = threshold
+        self._arrival = set(arrival_tasks) - set(departure_tasks)
+        self._departure = set(departure_tasks) - set(arrival_tasks)
+        self._codes = {"task": {}, "aircraft": {}, "hour": {h: h for h in range(HOURS)}}
+        self._views = {dims: self._empty(dims) for dims in VIEWS}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, threshold: float, arrival_tasks, departure_tasks) -> "DelayCube":
+        cube = cls(threshold, arrival_tasks, departure_tasks)
+        cube.add_rows(df)
+        return cube
+
+    def _size(self, dim: str) -> int:
+        return max(len(self._codes[dim]), 1) if dim != "hour" else HOURS
+
+    def _empty(self, dims) -> dict:
+        shape = tuple(self._size(d) for d in dims)
+        return {
+            "hist": np.zeros(shape + (_BINS,), dtype=np.int32),
+            "delayed": np.zeros(shape, dtype=np.int64),
+            "offset_sum": np.zeros(shape),
+            "offset_n": np.zeros(shape, dtype=np.int64),
+        }
+
+    def _encode(self, dim: str, factorized) -> np.ndarray:
+        codes = self._codes[dim]
+        inverse, uniques = factorized
+        for label in uniques:
+            codes.setdefault(label, len(codes))
+        mapped = np.fromiter((codes[label] for label in uniques), dtype=np.int64, count=len(uniques))
+        self._grow(dim)
+        return mapped[inverse]
+
+    def _grow(self, dim: str):
+        """Widen every view on ``dim`` (doubling) once new labels outgrow it."""
+        needed = len(self._codes[dim])
+        for dims, view in self._views.items():
+            if dim not in dims:
+                continue
+            axis = dims.index(dim)
+            size = view["delayed"].shape[axis]
+            if needed <= size:
+                continue
+            extra = max(needed, 2 * size) - size
+            for name, arr in view.items():
+                pad = [(0, 0)] * arr.ndim
+                pad[axis] = (0, extra)
+                view[name] = np.pad(arr, pad)
+
+    def _features(self, rows: pd.DataFrame) -> dict:
+        act = rows["actual_duration_minutes"].to_numpy(dtype=float)
+        est = rows["estimated_duration_minutes"].to_numpy(dtype=float)
+        started = rows["started_at"]
+        valid = (~np.isnan(act) & ~np.isnan(est) & started.notna().to_numpy()
+                 & rows["task_name"].notna().to_numpy() & rows["airfcraft_meridian"].notna().to_numpy())
+        rows, act, est, started = rows[valid], act[valid], est[valid], started[valid]
+
+        task = _factorized(rows["task_name"])
+        to_arrival = (started - rows["arrival_fact_meridian"]).dt.total_seconds().to_numpy() / 60
+        to_departure = (started - rows["departure_fact_meridian"]).dt.total_seconds().to_numpy() / 60
+        nearer_arrival = np.abs(np.nan_to_num(to_arrival, nan=np.inf)) <= np.abs(np.nan_to_num(to_departure, nan=np.inf))
+        is_arrival = np.array([t in self._arrival for t in task[1]], dtype=bool)[task[0]]
+        is_departure = np.array([t in self._departure for t in task[1]], dtype=bool)[task[0]]
+        offset = np.where(is_arrival | (~is_departure & nearer_arrival), to_arrival, to_departure)
+
+        return {
+            "task": task,
+            "aircraft": _factorized(rows["airfcraft_meridian"]),
+            "hour": started.dt.hour.to_numpy(),
+            "bin": np.clip(np.floor(act - est), OVERRUN_MIN, OVERRUN_MAX).astype(np.int64) - OVERRUN_MIN,
+            "delayed": (act > est * self.threshold).astype(np.int64),
+            "offset": np.nan_to_num(offset),
+            "has_offset": (~np.isnan(offset)).astype(np.int64),
+        }
+
+    def _apply(self, rows: pd.DataFrame, sign: int):
+        with self._lock:
+            f = self._features(rows)
+            codes = {dim: self._encode(dim, f[dim]) for dim in ("task", "aircraft")}
+            codes["hour"] = f["hour"]
+            for dims, view in self._views.items():
+                cell = tuple(codes[d] for d in dims)
+                _accumulate(view["hist"], cell + (f["bin"],), sign)
+                _accumulate(view["delayed"], cell, sign * f["delayed"])
+                _accumulate(view["offset_sum"], cell, sign * f["offset"])
+                _accumulate(view["offset_n"], cell, sign * f["has_offset"])
+
+    def add_rows(self, rows: pd.DataFrame):
+        self._apply(rows, 1)
+
+    def remove_rows(self, rows: pd.DataFrame):
+        self._apply(rows, -1)
+
+    @staticmethod
+    def _stats(view: dict, cells=Ellipsis) -> dict:
+        hist = view["hist"][cells]
+        n = hist.sum(-1, dtype=np.int64)
+        cum = hist.cumsum(-1, dtype=np.int64)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return {
+                "tasks": n,
+                "delayed": view["delayed"][cells],
+                "delay_rate": view["delayed"][cells] / n,
+                "p50_overrun": _percentile(cum, n, 0.5),
+                "p95_overrun": _percentile(cum, n, 0.95),
+                "mean_start_offset": view["offset_sum"][cells] / view["offset_n"][cells],
+            }
+
+    def stats(self, task=None, aircraft=None, hour=None) -> dict:
+        """Statistics of one cell, e.g. ``stats(task="Refueling", hour=7)``; all tasks when nothing is given."""
+        given = {"task": task, "aircraft": aircraft, "hour": hour}
+        dims = tuple(d for d in ("task", "aircraft", "hour") if given[d] is not None)
+        with self._lock:
+            if not dims:
+                view = self._views[("hour",)]
+                return {k: v.item() for k, v in self._stats({k: a.sum(0) for k, a in view.items()}).items()}
+            if dims not in self._views:
+                raise ValueError(f"no delay view over {dims}; available: {VIEWS}")
+            codes = [self._codes[d].get(given[d]) for d in dims]
+            if any(c is None for c in codes):
+                return {k: 0 if k in ("tasks", "delayed") else np.nan for k in STAT_COLUMNS}
+            return {k: v.item() for k, v in self._stats(self._views[dims], tuple(codes)).items()}
+
+    def summary(self, by=("task",)) -> pd.DataFrame:
+        """Statistics of every non-empty cell of one view, indexed by its labels."""
+        dims = (by,) if isinstance(by, str) else tuple(by)
+        if dims not in self._views:
+            raise ValueError(f"no delay view over {dims}; available: {VIEWS}")
+        with self._lock:
+            view = self._views[dims]
+            stats = self._stats(view)
+            labels = [sorted(self._codes[d], key=self._codes[d].get) for d in dims]
+            shape = stats["tasks"].shape
+            index = pd.MultiIndex.from_product(
+                [pd.Index(l + [None] * (size - len(l)), dtype=object) for l, size in zip(labels, shape)],
+                names=list(dims),
+            )
+        out = pd.DataFrame({k: np.ravel(v) for k, v in stats.items()}, index=index)[STAT_COLUMNS]
+        out = out[out["tasks"] > 0]
+        if len(dims) == 1:
+            out.index = out.index.get_level_values(0)
+        return out.sort_index()
@@ -0,0 +1,137 @@
+from collections import Counter
+
+import pandas as pd
+
+ALL_DAYS = "all"
+
+
+def _clean(value):
+    return None if pd.isna(value) else value
+
+
+def _values(s: pd.Series) -> pd.Series:
+    # value_counts over categoricals would count every unobserved combination as well
+    return s.astype(s.cat.categories.dtype) if isinstance(s.dtype, pd.CategoricalDtype) else s
+
+
+def _row_pairs(rows: pd.DataFrame) -> Counter:
+    """Row counts per (service day, aircraft, flight); every row also counts under ALL_DAYS."""
+    flights = pd.DataFrame({
+        "tail": _values(rows["airfcraft_meridian"]),
+        "flight": _values(rows["flight_number_meridian"]),
+        "arrival_day": rows["arrival_fact_meridian"].dt.normalize(),
+        "departure_day": rows["departure_fact_meridian"].dt.normalize(),
+    }).value_counts(dropna=False)
+
+    pairs = Counter()
+    for (tail, flight, arrival_day, departure_day), n in flights.items():
+        tail, flight = _clean(tail), _clean(flight)
+        if tail is None and flight is None:
+            continue
+        for day in {ALL_DAYS, _clean(arrival_day), _clean(departure_day)} - {None}:
+            pairs[(day, tail, flight)] += int(n)
+    return pairs
+
+
+class FilterIndex:
+    """Aircraft <-> flight adjacency per service day, shared by every session.
+
+    Links are reference-counted by task rows, so adding or removing rows only touches
+    the pairs those rows belong to.
+    """
+
+    def __init__(self):
+        self._pair_rows = Counter()
+        self._aircraft = {}
+        self._flights = {}
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "FilterIndex":
+        index = cls()
+        index.add_rows(df)
+        return index
+
+    @classmethod
+    def from_pairs(cls, pairs: pd.DataFrame) -> "FilterIndex":
+        """Rebuild from a ``pair_frame()`` without rescanning task rows."""
+        index = cls()
+        day_codes, days = pd.factorize(pairs["day"])
+        days = list(days) + [ALL_DAYS]  # code -1 (NaT) is the last entry
+        keys = zip(
+            [days[c] for c in day_codes.tolist()],
+            [_clean(v) for v in pairs["tail"].tolist()],
+            [_clean(v) for v in pairs["flight"].tolist()],
+        )
+        index._pair_rows = Counter(dict(zip(keys, pairs["rows"].tolist())))
+        for key in index._pair_rows:
+            index._link(*key)
+        return index
+
+    def pair_frame(self) -> pd.DataFrame:
+        """Task-row counts per (day, aircraft, flight) link, with NaT for ALL_DAYS; see from_pairs."""
+        keys = list(self._pair_rows)
+        return pd.DataFrame({
+            "day": pd.to_datetime(pd.Series([None if k[0] == ALL_DAYS else k[0] for k in keys], dtype=object)),
+            "tail": pd.Series([k[1] for k in keys], dtype=object),
+            "flight": pd.Series([k[2] for k in keys], dtype=object),
+            "rows": pd.Series(list(self._pair_rows.values()), dtype="int64"),
+        })
+
+    def add_rows(self, rows: pd.DataFrame):
+        self._apply(_row_pairs(rows), 1)
+
+    def remove_rows(self, rows: pd.DataFrame):
+        self._apply(_row_pairs(rows), -1)
+
+    def _apply(self, pairs: Counter, sign: int):
+        for key, n in pairs.items():
+            before = self._pair_rows.get(key, 0)
+            after = before + sign * n
+            if after > 0:
+                self._pair_rows[key] = after
+                if before == 0:
+                    self._link(*key)
+            elif before > 0:
+                del self._pair_rows[key]
+                self._unlink(*key)
+
+    def _link(self, day, tail, flight):
+        if tail is not None:
+            linked = self._aircraft.setdefault(day, {}).setdefault(tail, set())
+            if flight is not None:
+                linked.add(flight)
+        if flight is not None:
+            linked = self._flights.setdefault(day, {}).setdefault(flight, set())
+            if tail is not None:
+                linked.add(tail)
+
+    def _unlink(self, day, tail, flight):
+        if tail is not None:
+            by_tail = self._aircraft[day]
+            by_tail[tail].discard(flight)
+            if not by_tail[tail] and (day, tail, None) not in self._pair_rows:
+                del by_tail[tail]
+        if flight is not None:
+            by_flight = self._flights[day]
+            by_flight[flight].discard(tail)
+            if not by_flight[flight] and (day, None, flight) not in self._pair_rows:
+                del by_flight[flight]
+
+    @staticmethod
+    def _linked(lookup: dict, keys: list) -> list:
+        found = set()
+        for k in set(keys):
+            found |= lookup.get(k, set())
+        return sorted(found)
+
+    def aircraft(self, day=ALL_DAYS, flights=None) -> list:
+        """Aircraft seen on ``day``, restricted to those that flew any of ``flights``."""
+        if flights:
+            return self._linked(self._flights.get(day, {}), flights)
+        return sorted(self._aircraft.get(day, {}))
+
+    def flights(self, day=ALL_DAYS, aircraft=None) -> list:
+        """Flights seen on ``day``, restricted to those flown by any of ``aircraft``."""
+        if aircraft:
+            return self._linked(self._aircraft.get(day, {}), aircraft)
+        return sorted(self._flights.get(day, {}))
@@ -1,12 +1,46 @@
+import threading
+
 import streamlit as st
-from mock_data import distinct_aircraft as _da, distinct_flights as _df
+from mock_data import distinct_aircraft as _da, distinct_flights as _df, get_data_source
+
+# Lookups of the cached database option lists and how many of them ran the query.
+_SOURCE_CACHE_STATS = {"lookups": 0, "misses": 0}
+_SOURCE_CACHE_LOCK = threading.Lock()
+
+
+def _count(name: str):
+    with _SOURCE_CACHE_LOCK:
+        _SOURCE_CACHE_STATS[name] += 1
+
 
+def source_cache_stats() -> dict:
+    with _SOURCE_CACHE_LOCK:
+        return dict(_SOURCE_CACHE_STATS)
 
+
+# The in-memory dataset answers from the shared aircraft<->flight index, which is kept
+# current on every data change; only database lookups are worth caching here.
 @st.cache_data(ttl=60)
-def distinct_aircraft(date_choice: str, chosen_flights: list) -> list:
-    return _da(date_choice, chosen_flights)
+def _source_aircraft(date_choice, chosen_flights: tuple) -> list:
+    _count("misses")
+    return _da(date_choice, list(chosen_flights))
 
 
 @st.cache_data(ttl=60)
-def distinct_flights(date_choice: str, chosen_aircraft: list) -> list:
-    return _df(date_choice, chosen_aircraft)
+def _source_flights(date_choice, chosen_aircraft: tuple) -> list:
+    _count("misses")
+    return _df(date_choice, list(chosen_aircraft))
+
+
+def distinct_aircraft(date_choice, chosen_flights: list) -> list:
+    if get_data_source() is None:
+        return _da(date_choice, chosen_flights)
+    _count("lookups")
+    return _source_aircraft(date_choice, tuple(sorted(chosen_flights or [])))
+
+
+def distinct_flights(date_choice, chosen_aircraft: list) -> list:
+    if get_data_source() is None:
+        return _df(date_choice, chosen_aircraft)
+    _count("lookups")
+    return _source_flights(date_choice, tuple(sorted(chosen_aircraft or [])))
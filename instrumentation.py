@@ -0,0 +1,63 @@
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from settings import DIAGNOSTICS_ENABLED
+
+LOGGER = logging.getLogger("flight_monitor.timing")
+
+_LOCAL = threading.local()
+
+
+class _NullRecord(dict):
+    def __setitem__(self, key, value):
+        pass
+
+
+_NULL_RECORD = _NullRecord()
+
+
+def enabled() -> bool:
+    return DIAGNOSTICS_ENABLED
+
+
+def active() -> bool:
+    return getattr(_LOCAL, "trace", None) is not None
+
+
+def begin_rerun(**context):
+    """Start collecting stage timings for the current script run (one per session thread)."""
+    if not DIAGNOSTICS_ENABLED:
+        return
+    _LOCAL.trace = {"context": context, "stages": [], "started": time.perf_counter()}
+
+
+@contextmanager
+def stage(name: str):
+    """Time a block; the yielded dict takes extra counts such as rows or html_bytes."""
+    trace = getattr(_LOCAL, "trace", None) if DIAGNOSTICS_ENABLED else None
+    if trace is None:
+        yield _NULL_RECORD
+        return
+    record = {"stage": name}
+    t0 = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record["ms"] = (time.perf_counter() - t0) * 1000
+        trace["stages"].append(record)
+
+
+def end_rerun() -> dict:
+    """Finish the current run, emit one structured log line per stage and return the trace."""
+    trace = getattr(_LOCAL, "trace", None)
+    _LOCAL.trace = None
+    if trace is None:
+        return {}
+    trace["total_ms"] = (time.perf_counter() - trace.pop("started")) * 1000
+    for record in trace["stages"]:
+        LOGGER.info(json.dumps(dict(trace["context"], **record), default=str))
+    LOGGER.info(json.dumps(dict(trace["context"], stage="rerun", ms=trace["total_ms"]), default=str))
+    return trace
@@ -0,0 +1,253 @@
+import argparse
+import datetime as dt
+import json
+import logging
+import random
+import resource
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import streamlit
+from streamlit.testing.v1 import AppTest
+
+# _shared_server patches these Streamlit internals, as laid out in Streamlit 1.66.
+_STREAMLIT_CHECKED = "1.66"
+try:
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import app_test, local_script_runner
+    from streamlit.testing.v1.util import patch_config_options
+except ImportError as exc:
+    raise ImportError(f"load_test.py patches Streamlit internals last checked on Streamlit {_STREAMLIT_CHECKED}; "
+                      f"Streamlit {streamlit.__version__} does not have them: {exc}") from exc
+
+import filters
+import mock_data
+import utility
+from benchmarks import _git_commit, _print_results
+from settings import APP_USER, TASKS_DB_TABLE
+
+APP_PATH = str(Path(__file__).parent / "app.py")
+SESSION_COUNTS = (1, 4, 16)
+ACTION_WEIGHTS = {"tab": 3, "dates": 2, "aircraft": 2, "flights": 2, "page": 1, "reload": 1}
+
+
+def _rss_bytes() -> int:
+    """Current resident set size; falls back to the peak where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _check_streamlit_internals():
+    """Fail fast, naming the installed version, when an internal _shared_server patches has moved."""
+    needed = [(Runtime.__dict__, "Runtime", ("instance", "exists", "_instance")),
+              (vars(app_test), "app_test", ("patch_config_options", "ScriptCache")),
+              (vars(local_script_runner), "local_script_runner", ("ScriptCache",)),
+              (vars(ScriptCache), "ScriptCache", ("get_bytecode",))]
+    missing = [f"{owner}.{name}" for attrs, owner, names in needed for name in names if name not in attrs]
+    if missing:
+        raise RuntimeError(f"load_test.py patches Streamlit internals last checked on Streamlit {_STREAMLIT_CHECKED}; "
+                           f"Streamlit {streamlit.__version__} lacks {', '.join(missing)}")
+
+
+@contextmanager
+def _shared_server():
+    """Make concurrent AppTest sessions share one runtime and one compiled script, like a server.
+
+    AppTest installs a mock Runtime singleton for each run and clears it when the run
+    finishes, which would pull it out from under runs still going in other sessions; the
+    first one installed is pinned instead. Its per-run config override is likewise applied
+    once around the whole load. It also recompiles the script on every run, which a server
+    does once, up front.
+    """
+    _check_streamlit_internals()
+    saved = (Runtime.__dict__["instance"], Runtime.__dict__["exists"], app_test.patch_config_options,
+             app_test.ScriptCache, local_script_runner.ScriptCache)
+    pinned = {}
+    script_cache = ScriptCache()
+
+    def instance(cls):
+        runtime = pinned.setdefault("runtime", cls._instance)
+        if runtime is None:
+            pinned.clear()
+            raise RuntimeError("Runtime hasn't been created!")
+        return runtime
+
+    # Compile before any session starts: ``ast.parse`` racing other threads' traceback
+    # formatting fails intermittently on Python 3.11.
+    script_cache.get_bytecode(APP_PATH)
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(lambda cls: bool(pinned) or cls._instance is not None)
+    app_test.patch_config_options = lambda overrides: nullcontext()
+    app_test.ScriptCache = local_script_runner.ScriptCache = lambda: script_cache
+    try:
+        with patch_config_options({"global.appTest": True}):
+            yield
+    finally:
+        (Runtime.instance, Runtime.exists, app_test.patch_config_options,
+         app_test.ScriptCache, local_script_runner.ScriptCache) = saved
+
+
+def _pick_options(rng: random.Random, options: list) -> list:
+    return rng.sample(options, rng.randint(0, min(3, len(options)))) if options else []
+
+
+def _act(at: AppTest, action: str, rng: random.Random):
+    """One user interaction; every branch ends in exactly one rerun."""
+    today = dt.date.today()
+    if action == "tab":
+        at.radio(key="tab_choice").set_value(rng.choice(["All", "Departure", "Arrival"]))
+    elif action == "dates":
+        days = rng.choice([(), (today,), (today - dt.timedelta(days=1),), (today - dt.timedelta(days=6), today)])
+        at.date_input(key="date_range_input").set_value(days)
+    elif action == "aircraft":
+        box = at.multiselect(key="aircraft_ms")
+        box.set_value(_pick_options(rng, box.options))
+    elif action == "flights":
+        box = at.multiselect(key="flight_ms")
+        box.set_value(_pick_options(rng, box.options))
+    elif action == "page" and any(w.key == "board_page" for w in at.number_input):
+        page = at.number_input(key="board_page")
+        page.set_value(rng.randint(int(page.min), int(page.max)))
+    at.run()
+
+
+def _session(n: int, reruns: int, think_s: float, seed: int, timeout: float, records: list, lock: threading.Lock):
+    """One signed-in browser tab: a first load, then ``reruns`` random interactions."""
+    rng = random.Random(seed * 1_000_003 + n)
+    actions, weights = list(ACTION_WEIGHTS), list(ACTION_WEIGHTS.values())
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    at.session_state.auth_ok = True
+    at.session_state.username = APP_USER
+    for step in range(reruns + 1):
+        action = "load" if step == 0 else rng.choices(actions, weights)[0]
+        t0 = time.perf_counter()
+        error = None
+        try:
+            if step == 0:
+                at.run()
+            else:
+                _act(at, action, rng)
+            if at.exception:
+                error = at.exception[0].value
+        except Exception as exc:  # a failed rerun is a result, not a reason to stop the run
+            error = repr(exc)
+        with lock:
+            records.append({"session": n, "action": action, "seconds": time.perf_counter() - t0, "error": error})
+        if think_s:
+            time.sleep(rng.expovariate(1 / think_s))
+
+
+def _latency_ms(seconds: list) -> dict:
+    if not seconds:
+        return {}
+    q = np.percentile(np.asarray(seconds) * 1000, [50, 90, 99])
+    return {"p50_ms": q[0], "p90_ms": q[1], "p99_ms": q[2], "max_ms": max(seconds) * 1000}
+
+
+def run_load(sessions: int, reruns: int = 20, think_s: float = 0.2, seed: int = 0, timeout: float = 60) -> dict:
+    """Run ``sessions`` concurrent sessions in this process and summarise their reruns."""
+    records, lock = [], threading.Lock()
+    before = {"pivot": mock_data.pivot_cache_stats(), "rows": utility.row_cache_stats(),
+              "source": filters.source_cache_stats()}
+    rss = {"start": _rss_bytes(), "peak": 0}
+    stop = threading.Event()
+
+    def sample_rss():
+        while not stop.wait(0.1):
+            rss["peak"] = max(rss["peak"], _rss_bytes())
+
+    sampler = threading.Thread(target=sample_rss, daemon=True)
+    sampler.start()
+    threads = [
+        threading.Thread(target=_session, args=(n, reruns, think_s, seed, timeout, records, lock), name=f"load-{n}")
+        for n in range(sessions)
+    ]
+    with _shared_server():
+        t0 = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        wall = time.perf_counter() - t0
+    stop.set()
+    sampler.join()
+    rss["end"] = _rss_bytes()
+
+    def delta(now: dict, then: dict, *names):
+        return {n: now[n] - then[n] for n in names}
+
+    ok = [r["seconds"] for r in records if r["error"] is None]
+    summary = {
+        "sessions": sessions,
+        "reruns": len(records),
+        "errors": sum(r["error"] is not None for r in records),
+        "wall_seconds": wall,
+        "reruns_per_second": len(records) / wall,
+        **_latency_ms(ok),
+        "rss_start_mb": rss["start"] / 2**20,
+        "rss_peak_mb": max(rss["peak"], rss["end"]) / 2**20,
+        "rss_end_mb": rss["end"] / 2**20,
+        **{f"pivot_{k}": v for k, v in delta(mock_data.pivot_cache_stats(), before["pivot"], "hits", "misses").items()},
+        **{f"row_{k}": v for k, v in delta(utility.row_cache_stats(), before["rows"], "hits", "misses").items()},
+        **{f"source_{k}": v for k, v in delta(filters.source_cache_stats(), before["source"], "lookups", "misses").items()},
+    }
+    by_action = (
+        pd.DataFrame(records).query("error.isna()").groupby("action")["seconds"]
+        .apply(lambda s: _latency_ms(list(s))["p50_ms"]).to_dict()
+        if ok else {}
+    )
+    errors = sorted({r["error"] for r in records if r["error"] is not None})
+    return {"summary": summary, "p50_ms_by_action": by_action, "errors": errors[:10]}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent-session load test of app.py on Streamlit's AppTest.")
+    parser.add_argument("--sessions", type=int, nargs="+", default=list(SESSION_COUNTS))
+    parser.add_argument("--reruns", type=int, default=20, help="interactions per session after its first load")
+    parser.add_argument("--think", type=float, default=0.2, help="mean pause between interactions, seconds")
+    parser.add_argument("--flights", type=int, default=0, help="replace the mock dataset with N generated flights")
+    parser.add_argument("--db-url", help="serve tasks from this database (e.g. sqlite:///tasks.db, seeded if empty)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=60, help="per-rerun AppTest timeout, seconds")
+    parser.add_argument("--out", type=Path, help="write results as JSON")
+    args = parser.parse_args(argv)
+
+    # Empty widget labels log a warning with a formatted stack on every rerun of every session.
+    logging.disable(logging.WARNING)
+    if args.flights:
+        mock_data.install_base_df(mock_data.derive_task_columns(mock_data.generate_task_rows(args.flights, seed=args.seed)))
+    if args.db_url:
+        import sqlalchemy as sa
+        from data_source import SqlTaskSource, get_engine, write_tasks
+
+        if not sa.inspect(get_engine(args.db_url)).has_table(TASKS_DB_TABLE):
+            write_tasks(mock_data.load_base_df(), args.db_url, TASKS_DB_TABLE)
+        mock_data.set_data_source(SqlTaskSource(args.db_url, TASKS_DB_TABLE))
+
+    runs = []
+    for sessions in args.sessions:
+        result = run_load(sessions, args.reruns, args.think, args.seed, args.timeout)
+        _print_results([result["summary"]])
+        for error in result["errors"]:
+            print(f"  error: {error}")
+        runs.append(result)
+    if args.out:
+        args.out.write_text(json.dumps({
+            "commit": _git_commit(),
+            "task_rows": len(mock_data.load_base_df()) if not args.db_url else None,
+            "db_url": args.db_url,
+            "think_seconds": args.think,
+            "runs": runs,
+        }, indent=2, default=float))
+
+
+if __name__ == "__main__":
+    main()
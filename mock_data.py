@@ -1,6 +1,18 @@
+import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+import bisect
+import logging
 import random
+import threading
+import time
+
+from delay_analytics import DelayCube
+from filter_index import ALL_DAYS, FilterIndex
+from settings import COMPACT_DATASET, DELAY_ANALYTICS_THRESHOLD, SNAPSHOT_DIR, SNAPSHOT_POLL_SECONDS
+from snapshot import current_generation, publish_snapshot, publisher_lock, read_snapshot
 
 TASKS_ARRIVAL = [
     "Opening cargo doors", "Opening doors", "Passenger disembarkation", "Unloading catering",
@@ -15,114 +27,1046 @@ TASKS_DEPARTURE = [
 
 _RNG = random.Random(42)
 _BASE_DF = None
+_BASE_INDEX = None
+_DATA_SOURCE = None
+_DATA_VERSION = 0
+
+PIVOT_CACHE_SIZE = 64
+_PIVOT_CACHE = OrderedDict()
+_PIVOT_CACHE_STATS = {"hits": 0, "misses": 0, "evictions": 0, "patched": 0}
+_PIVOT_CACHE_LOCK = threading.Lock()
+_SNAPSHOT_LOCK = threading.RLock()
+
+_LOGGER = logging.getLogger(__name__)
+_REFRESHER = {"thread": None, "stop": None}
+_REFRESH_STATUS = {"runs": 0, "errors": 0, "last_seconds": None, "last_finished": None, "last_error": None}
+# Generation of the shared snapshot the base frame maps; "mapped" is False once this process holds a private copy.
+_SNAPSHOT_STATE = {"generation": None, "mapped": False, "checked": 0.0, "publisher": None}
+_SYNC_LOCK = threading.Lock()
 
 
 def regenerate_mock_data():
-    global _BASE_DF
-    _BASE_DF = _make_base_df()
+    install_base_df(_make_base_df())
+
+
+def data_version() -> int:
+    return _DATA_VERSION
+
+
+def bump_data_version() -> int:
+    """Mark the base dataset as changed; cached pivots from older versions are dropped."""
+    global _DATA_VERSION
+    with _PIVOT_CACHE_LOCK:
+        _DATA_VERSION += 1
+        _PIVOT_CACHE.clear()
+    return _DATA_VERSION
+
+
+def pivot_cache_stats() -> dict:
+    with _PIVOT_CACHE_LOCK:
+        return dict(_PIVOT_CACHE_STATS, size=len(_PIVOT_CACHE), version=_DATA_VERSION)
+
+
+def clear_pivot_cache():
+    with _PIVOT_CACHE_LOCK:
+        _PIVOT_CACHE.clear()
+        for k in _PIVOT_CACHE_STATS:
+            _PIVOT_CACHE_STATS[k] = 0
+
+
+TAIL_PREFIXES = ["A", "B", "C", "D"]
+FLIGHT_PREFIXES = ["TA", "AC", "UA", "KL", "AZ"]
+_TASK_SEQUENCE = np.array(TASKS_ARRIVAL + TASKS_DEPARTURE, dtype=object)
+_IS_ARRIVAL_TASK = np.arange(len(_TASK_SEQUENCE)) < len(TASKS_ARRIVAL)
+
 
+def _generate_flights(rng: np.random.Generator, num: int, now: np.datetime64, first_row: int = 0) -> pd.DataFrame:
+    """Task rows for ``num`` flights, arrival tasks then departure tasks per flight."""
+    minute = np.timedelta64(1, "m")
+    tails = np.char.add(rng.choice(TAIL_PREFIXES, num), rng.integers(1000, 10000, num).astype(str))
+    flights = np.char.add(rng.choice(FLIGHT_PREFIXES, num), rng.integers(100, 1000, num).astype(str))
 
-def _rand_tail():
-    return _RNG.choice(["A", "B", "C", "D"]) + str(_RNG.randint(1000, 9999))
+    day_shift = np.where(rng.random(num) < 0.6, 0, 1)
+    base_day = now - day_shift * np.timedelta64(1, "D")
+    arr_time = base_day - rng.integers(30, 181, num) * minute
+    dep_time = base_day + rng.integers(30, 181, num) * minute
 
+    per_flight = len(_TASK_SEQUENCE)
+    size = num * per_flight
+    flight_idx = np.repeat(np.arange(num), per_flight)
+    is_arrival = np.tile(_IS_ARRIVAL_TASK, num)
 
-def _rand_flight():
-    return _RNG.choice(["TA", "AC", "UA", "KL", "AZ"]) + str(_RNG.randint(100, 999))
+    est = rng.integers(5, 26, size)
+    mu = np.trunc(est * 0.95)
+    act = np.maximum(1, np.trunc(rng.normal(mu, 3))).astype(np.int64)
+    offset = np.where(is_arrival, rng.integers(0, 11, size), -rng.integers(10, 31, size))
+    start = np.where(is_arrival, arr_time[flight_idx], dep_time[flight_idx]) + offset * minute
+    end = start + act * minute
+
+    return pd.DataFrame({
+        "flight_number_meridian": flights[flight_idx],
+        "airfcraft_meridian": tails[flight_idx],
+        "task_name": np.tile(_TASK_SEQUENCE, num),
+        "departure_fact_meridian": dep_time[flight_idx].astype("datetime64[us]"),
+        "arrival_fact_meridian": arr_time[flight_idx].astype("datetime64[us]"),
+        "actual_duration_minutes": act,
+        "estimated_duration_minutes": est.astype(np.int64),
+        "started_at": start.astype("datetime64[us]"),
+        "completed_at": end.astype("datetime64[us]"),
+    }, index=pd.RangeIndex(first_row, first_row + size))
+
+
+def _generator_start(seed, now):
+    now = now if now is not None else datetime.now().replace(microsecond=0)
+    return np.random.default_rng(seed), np.datetime64(now, "s")
+
+
+def generate_task_rows(num_flights: int, seed=None, now=None) -> pd.DataFrame:
+    """Vectorized synthetic task rows with the mock dataset's distributions."""
+    rng, now = _generator_start(seed, now)
+    return _generate_flights(rng, num_flights, now)
+
+
+def iter_task_chunks(num_flights: int, chunk_flights: int = 100_000, seed=None, now=None):
+    """Stream the same synthetic rows as ``generate_task_rows`` in chunks of flights."""
+    rng, now = _generator_start(seed, now)
+    rows = 0
+    for done in range(0, num_flights, chunk_flights):
+        chunk = _generate_flights(rng, min(chunk_flights, num_flights - done), now, first_row=rows)
+        rows += len(chunk)
+        yield chunk
 
 
 def _build_base_rows(num=24) -> pd.DataFrame:
-    now = datetime.now().replace(microsecond=0)
-    rows = []
-    for _ in range(num):
-        tail = _rand_tail()
-        flt = _rand_flight()
-
-        day_shift = 0 if _RNG.random() < 0.6 else 1
-        base_day = now - timedelta(days=day_shift)
-
-        arr_time = base_day - timedelta(minutes=_RNG.randint(30, 180))
-        dep_time = base_day + timedelta(minutes=_RNG.randint(30, 180))
-
-        for t in TASKS_ARRIVAL:
-            est = _RNG.randint(5, 25)
-            mu = int(est * 0.95)
-            act = max(1, int(_RNG.gauss(mu, 3)))
-            start = arr_time + timedelta(minutes=_RNG.randint(0, 10))
-            end = start + timedelta(minutes=act)
-            rows.append({
-                "flight_number_meridian": flt,
-                "airfcraft_meridian": tail,
-                "task_name": t,
-                "departure_fact_meridian": dep_time,
-                "arrival_fact_meridian": arr_time,
-                "actual_duration_minutes": act,
-                "estimated_duration_minutes": est,
-                "started_at": start,
-                "completed_at": end,
-            })
-
-        for t in TASKS_DEPARTURE:
-            est = _RNG.randint(5, 25)
-            mu = int(est * 0.95)
-            act = max(1, int(_RNG.gauss(mu, 3)))
-            start = dep_time - timedelta(minutes=_RNG.randint(10, 30))
-            end = start + timedelta(minutes=act)
-            rows.append({
-                "flight_number_meridian": flt,
-                "airfcraft_meridian": tail,
-                "task_name": t,
-                "departure_fact_meridian": dep_time,
-                "arrival_fact_meridian": arr_time,
-                "actual_duration_minutes": act,
-                "estimated_duration_minutes": est,
-                "started_at": start,
-                "completed_at": end,
-            })
-    df = pd.DataFrame(rows)
-    for c in ["started_at", "completed_at", "arrival_fact_meridian", "departure_fact_meridian"]:
-        df[c] = pd.to_datetime(df[c])
+    return generate_task_rows(num, seed=_RNG.getrandbits(64))
+
+
+DELAY_THRESHOLD = 1.18
+
+
+_CLOCK_TEXT = np.array([f"{s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d}" for s in range(86400)], dtype=object)
+
+
+def _seconds_of_day(ts: pd.Series) -> np.ndarray:
+    """Whole seconds since midnight per timestamp; -1 for missing values."""
+    return ((ts - ts.dt.normalize()) // pd.Timedelta(seconds=1)).fillna(-1).to_numpy(dtype=np.int64)
+
+
+def _clock_text(ts: pd.Series) -> np.ndarray:
+    """HH:MM:SS per timestamp via a seconds-of-day lookup; None for missing values."""
+    secs = _seconds_of_day(ts)
+    out = _CLOCK_TEXT[secs]
+    out[secs < 0] = None
+    return out
+
+
+def _duration_text(df: pd.DataFrame) -> pd.Series:
+    """"HH:MM:SS - HH:MM:SS" per task; missing while either time is (a task still in progress)."""
+    start, end = _clock_text(df["started_at"]), _clock_text(df["completed_at"])
+    text = np.full(len(df), None, dtype=object)
+    known = ~(pd.isna(start) | pd.isna(end))
+    text[known] = start[known] + " - " + end[known]
+    return pd.Series(text, index=df.index, dtype=_TEXT_DTYPE)
+
+
+def _delay_flags(df: pd.DataFrame, threshold: float = DELAY_THRESHOLD) -> pd.Series:
+    return (df["actual_duration_minutes"] > (df["estimated_duration_minutes"] * threshold)).astype(int)
+
+
+_TEXT_DTYPE = pd.Series(["00:00:00 - 00:00:00"]).dtype
+
+
+def _duration_rank(df: pd.DataFrame) -> np.ndarray:
+    """Integer with the same order as ``duration_text`` (start, then end time of day); -1 where it is missing."""
+    start, end = _seconds_of_day(df["started_at"]), _seconds_of_day(df["completed_at"])
+    return np.where((start >= 0) & (end >= 0), start * 86400 + end, -1)
+
+
+def _duration_rank_text(ranks: np.ndarray) -> np.ndarray:
+    start, end = np.divmod(ranks, 86400)
+    return _CLOCK_TEXT[start] + " - " + _CLOCK_TEXT[end]
+
+
+def derive_task_columns(df: pd.DataFrame, threshold: float = DELAY_THRESHOLD) -> pd.DataFrame:
+    """Add ``duration_text`` and, when missing, ``delay_flag`` to raw task rows in place."""
+    df["duration_text"] = _duration_text(df)
+    if "delay_flag" not in df.columns:
+        df["delay_flag"] = _delay_flags(df, threshold)
     return df
 
 
 def _make_base_df() -> pd.DataFrame:
-    df = _build_base_rows(16)
+    df = derive_task_columns(_build_base_rows(16))
 
-    df["duration_text"] = (
-            df["started_at"].dt.strftime("%H:%M:%S") + " - " + df["completed_at"].dt.strftime("%H:%M:%S")
-    )
+    flip = np.random.default_rng(_RNG.getrandbits(64)).random(len(df)) < 0.4
+    df.loc[(df["delay_flag"] == 1).to_numpy() & flip, "delay_flag"] = 0
 
-    delay_threshold = 1.18
-    df["delay_flag"] = (df["actual_duration_minutes"] > (df["estimated_duration_minutes"] * delay_threshold)).astype(
-        int)
+    return df
 
-    flip_mask = (df["delay_flag"] == 1) & (pd.Series([_RNG.random() < 0.4 for _ in range(len(df))], index=df.index))
-    df.loc[flip_mask, "delay_flag"] = 0
 
-    return df
+COMPACT_CATEGORICAL = ["flight_number_meridian", "airfcraft_meridian", "task_name"]
+COMPACT_MINUTES = ["actual_duration_minutes", "estimated_duration_minutes"]
+
+
+def compact_task_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Compact storage for task rows: categorical names, int32 minutes, uint8 delay flag.
+
+    ``duration_text`` is dropped; pivot_frame formats it from the start and end times
+    only for the cells it keeps.
+    """
+    out = df.drop(columns=["duration_text"], errors="ignore")
+    for c in COMPACT_CATEGORICAL:
+        if c in out.columns and not isinstance(out[c].dtype, pd.CategoricalDtype):
+            out[c] = out[c].astype("category")
+    for c in COMPACT_MINUTES:
+        if c in out.columns and pd.api.types.is_integer_dtype(out[c].dtype):
+            out[c] = out[c].astype(np.int32)
+    if "delay_flag" in out.columns and pd.api.types.is_integer_dtype(out["delay_flag"].dtype):
+        out["delay_flag"] = out["delay_flag"].astype(np.uint8)
+    return out
+
+
+def _expanded_task_frame(df: pd.DataFrame) -> pd.DataFrame:
+    out = df.copy()
+    for c in COMPACT_CATEGORICAL:
+        if c in out.columns and isinstance(out[c].dtype, pd.CategoricalDtype):
+            out[c] = out[c].astype(out[c].cat.categories.dtype)
+    for c in COMPACT_MINUTES + ["delay_flag"]:
+        if c in out.columns and pd.api.types.is_integer_dtype(out[c].dtype):
+            out[c] = out[c].astype(np.int64)
+    if "duration_text" not in out.columns:
+        out.insert(out.columns.get_loc("completed_at") + 1, "duration_text", _duration_text(out))
+    return out
+
+
+def memory_report(df: pd.DataFrame = None) -> pd.DataFrame:
+    """Deep bytes per column of ``df`` (default: the base dataset) in expanded and compact storage."""
+    df = base_rows() if df is None else df
+    expanded, compact = _expanded_task_frame(df), compact_task_frame(df)
+    report = pd.DataFrame({
+        "expanded_dtype": expanded.dtypes.astype(str),
+        "expanded_bytes": expanded.memory_usage(index=False, deep=True),
+    })
+    report["compact_dtype"] = compact.dtypes.astype(str).reindex(report.index).fillna("lazy")
+    report["compact_bytes"] = compact.memory_usage(index=False, deep=True).reindex(report.index).fillna(0).astype(int)
+    report.loc["total"] = ["", report["expanded_bytes"].sum(), "", report["compact_bytes"].sum()]
+    report["saved"] = 1 - report["compact_bytes"] / report["expanded_bytes"]
+    return report
+
+
+def _prepared(df: pd.DataFrame) -> pd.DataFrame:
+    return compact_task_frame(df) if COMPACT_DATASET else df
+
+
+def _initial_base_df() -> pd.DataFrame:
+    if not SNAPSHOT_DIR:
+        return _prepared(_make_base_df())
+    found = read_snapshot(SNAPSHOT_DIR)
+    while found is None:
+        if _snapshot_publisher():
+            publish_snapshot(_prepared(_make_base_df()), SNAPSHOT_DIR)
+        else:
+            time.sleep(0.1)  # the publisher is building the first generation
+        found = read_snapshot(SNAPSHOT_DIR)
+    _SNAPSHOT_STATE.update(generation=found[0], mapped=True)
+    return found[1]
+
+
+def _snapshot_publisher() -> bool:
+    """Whether this process publishes to SNAPSHOT_DIR: the first to take its publisher lock does, until it exits."""
+    with _SNAPSHOT_LOCK:
+        if _SNAPSHOT_STATE["publisher"] is None:
+            _SNAPSHOT_STATE["publisher"] = publisher_lock(SNAPSHOT_DIR)
+        return _SNAPSHOT_STATE["publisher"] is not None
 
 
 def _get_base_df() -> pd.DataFrame:
     global _BASE_DF
+    base = _BASE_DF
+    if base is None:
+        with _SNAPSHOT_LOCK:
+            if _BASE_DF is None:
+                _BASE_DF = _initial_base_df()
+            base = _BASE_DF
+    return base
+
+
+def install_base_df(df: pd.DataFrame, warm: bool = True, generation: int = None, index: dict = None,
+                    mapped: bool = None) -> int:
+    """Atomically replace the base dataset with ``df``.
+
+    The index and, with ``warm``, every pivot cached for the current version are
+    rebuilt against the new frame first, so readers switch from one fully built
+    snapshot to the next without a cold rerun. ``generation`` marks ``df`` as a
+    mapped shared snapshot. ``index`` is a prebuilt index of ``df`` (restored by
+    base_cache.cold_start), installed as is; ``mapped`` overrides whether ``df``
+    is read-only.
+    """
+    global _BASE_DF, _BASE_INDEX, _DATA_VERSION
+    if index is None:
+        df = _prepared(df)
+        index = build_base_index(df)
+    boards = []
+    if warm and _BASE_INDEX is not None:
+        for threshold in list(_BASE_INDEX["delays"]):
+            index["delays"][threshold] = DelayCube.from_frame(df, threshold, TASKS_ARRIVAL, TASKS_DEPARTURE)
+    if warm and _DATA_SOURCE is None:
+        today = pd.Timestamp("today").normalize()
+        with _PIVOT_CACHE_LOCK:
+            keys = [k for k in _PIVOT_CACHE if k[-1] == _DATA_VERSION]
+        for tab, (date_choice, day), aircraft_t, flight_t, _ in keys:
+            if day is None or day == today:
+                rows = filtered_rows(index, date_choice, list(aircraft_t), list(flight_t))
+                boards.append(((tab, (date_choice, day), aircraft_t, flight_t), pivot_frame(rows, tab)))
+
+    with _INGEST_LOCK:
+        with _SNAPSHOT_LOCK:
+            _BASE_DF, _BASE_INDEX = df, index
+            _SNAPSHOT_STATE.update(generation=generation, mapped=generation is not None if mapped is None else mapped)
+        with _PIVOT_CACHE_LOCK:
+            _DATA_VERSION += 1
+            _PIVOT_CACHE.clear()
+            for key, board in boards:
+                _PIVOT_CACHE[key + (_DATA_VERSION,)] = board
+            return _DATA_VERSION
+
+
+def refresh_base_df(loader=None) -> bool:
+    """Load a new base dataset with ``loader`` (default: regenerate mock data) and install it.
+
+    With SNAPSHOT_DIR only the publisher process loads and publishes; the others
+    install the newest generation it published.
+    """
+    t0 = time.perf_counter()
+    try:
+        if SNAPSHOT_DIR and not _snapshot_publisher():
+            _get_base_df()
+            sync_snapshot(force=True)
+        elif SNAPSHOT_DIR:
+            df = (loader or _make_base_df)()
+            generation, df = read_snapshot(SNAPSHOT_DIR, publish_snapshot(_prepared(df), SNAPSHOT_DIR))
+            install_base_df(df, generation=generation)
+        else:
+            from base_cache import save_base_cache  # base_cache builds on this module
+
+            install_base_df((loader or _make_base_df)())
+            save_base_cache()
+    except Exception as exc:
+        _LOGGER.exception("base dataset refresh failed")
+        _REFRESH_STATUS.update(errors=_REFRESH_STATUS["errors"] + 1, last_error=repr(exc))
+        return False
+    _REFRESH_STATUS.update(runs=_REFRESH_STATUS["runs"] + 1, last_seconds=time.perf_counter() - t0,
+                           last_finished=pd.Timestamp.now(), last_error=None)
+    return True
+
+
+def _refresh_loop(interval_s: float, loader, stop: threading.Event):
     if _BASE_DF is None:
-        _BASE_DF = _make_base_df()
-    return _BASE_DF
+        refresh_base_df(loader)
+    while not stop.wait(interval_s):
+        refresh_base_df(loader)
+
+
+def start_background_refresh(interval_s: float, loader=None) -> bool:
+    """Reload the base dataset every ``interval_s`` seconds on one daemon thread per process.
+
+    Readers keep the current snapshot until the new one is fully built. Returns False
+    when a refresher is already running.
+    """
+    with _SNAPSHOT_LOCK:
+        thread = _REFRESHER["thread"]
+        if thread is not None and thread.is_alive():
+            return False
+        stop = threading.Event()
+        thread = threading.Thread(target=_refresh_loop, args=(interval_s, loader, stop),
+                                  name="base-df-refresh", daemon=True)
+        _REFRESHER.update(thread=thread, stop=stop)
+        thread.start()
+        return True
+
+
+def stop_background_refresh(timeout: float = None):
+    with _SNAPSHOT_LOCK:
+        thread, stop = _REFRESHER["thread"], _REFRESHER["stop"]
+        _REFRESHER.update(thread=None, stop=None)
+    if thread is not None:
+        stop.set()
+        thread.join(timeout)
+
+
+def refresh_status() -> dict:
+    thread = _REFRESHER["thread"]
+    return dict(_REFRESH_STATUS, running=thread is not None and thread.is_alive(),
+                snapshot_generation=_SNAPSHOT_STATE["generation"], snapshot_mapped=_SNAPSHOT_STATE["mapped"],
+                snapshot_publisher=_SNAPSHOT_STATE["publisher"] is not None)
+
+
+def sync_snapshot(force: bool = False) -> bool:
+    """Install a newer shared snapshot generation if one was published.
+
+    Cheap enough to call on every rerun: the generation file is read at most once
+    per SNAPSHOT_POLL_SECONDS, and only one thread per process installs.
+    """
+    if not SNAPSHOT_DIR or _BASE_DF is None:
+        return False
+    now = time.monotonic()
+    if not force and now - _SNAPSHOT_STATE["checked"] < SNAPSHOT_POLL_SECONDS:
+        return False
+    if not _SYNC_LOCK.acquire(blocking=False):
+        return False
+    try:
+        _SNAPSHOT_STATE["checked"] = now
+        generation = current_generation(SNAPSHOT_DIR)
+        installed = _SNAPSHOT_STATE["generation"]
+        if generation is None or (installed is not None and generation <= installed):
+            return False
+        try:
+            generation, df = read_snapshot(SNAPSHOT_DIR, generation)
+        except FileNotFoundError:  # superseded and pruned meanwhile; the next poll picks up the newer one
+            return False
+        install_base_df(df, generation=generation)
+        return True
+    finally:
+        _SYNC_LOCK.release()
 
 
 def load_base_df() -> pd.DataFrame:
-    return _get_base_df()
+    if _DATA_SOURCE is not None:
+        return _DATA_SOURCE.fetch("All dates", [], [])
+    return base_rows()
+
+
+def base_installed() -> bool:
+    """Whether a base dataset is installed yet; load_base_df and base_index build one on first use."""
+    return _BASE_DF is not None
+
+
+def base_rows() -> pd.DataFrame:
+    """The whole base dataset, including rows ingested since its frame was last folded."""
+    base, index = _get_base_df(), _BASE_INDEX
+    return base if index is None or index["frame"] is not base else index_rows(index)
+
+
+def get_data_source():
+    return _DATA_SOURCE
+
+
+def set_data_source(source):
+    """Serve task rows from ``source`` instead of the in-memory mock dataset.
+
+    A source provides ``fetch(date_choice, aircraft_list, flight_list)`` returning
+    filtered task rows and ``distinct(column, date_choice, aircraft_list, flight_list)``.
+    Pass None to go back to the mock dataset.
+    """
+    global _DATA_SOURCE
+    _DATA_SOURCE = source
+    bump_data_version()
+
+
+def date_range(first_day, last_day=None, shift=None) -> tuple:
+    """Date filter for the days ``first_day``..``last_day`` (inclusive), usable as any ``date_choice``.
+
+    ``shift=(start_hour, end_hour)`` keeps only that part of each day; an end at or before
+    the start runs past midnight. The filter is a tuple of ``(start, end)`` windows.
+    """
+    first = pd.Timestamp(first_day).normalize()
+    last = pd.Timestamp(last_day if last_day is not None else first_day).normalize()
+    start_h, end_h = shift if shift is not None else (0, 24)
+    if end_h <= start_h:
+        end_h += 24
+    windows = []
+    for day in pd.date_range(first, last, freq="D"):
+        start, end = day + pd.Timedelta(hours=start_h), day + pd.Timedelta(hours=end_h)
+        if windows and start <= windows[-1][1]:
+            windows[-1] = (windows[-1][0], end)
+        else:
+            windows.append((start, end))
+    return tuple(windows)
+
+
+def time_windows(date_choice):
+    """``(start, end)`` windows (end exclusive) selected by the date filter, or None for all dates.
+
+    ``date_choice`` is "All dates", "Today", "Yesterday" or a ``date_range``; a task row
+    matches when its flight's arrival or departure falls in any window.
+    """
+    if isinstance(date_choice, tuple):
+        return list(date_choice)
+    today = pd.Timestamp("today").normalize()
+    if date_choice == "Today":
+        return [(today, today + pd.Timedelta(days=1))]
+    if date_choice == "Yesterday":
+        return [(today - pd.Timedelta(days=1), today)]
+    return None
+
+
+def _single_day(windows):
+    """The calendar day when ``windows`` is exactly one whole day, else None."""
+    if windows is not None and len(windows) == 1:
+        start, end = windows[0]
+        if start == start.normalize() and end == start + pd.Timedelta(days=1):
+            return start
+    return None
+
+
+def _fetch_filtered(date_choice: str, aircraft_list: list, flight_list: list) -> pd.DataFrame:
+    if _DATA_SOURCE is not None:
+        return _DATA_SOURCE.fetch(date_choice, aircraft_list or [], flight_list or [])
+    return filtered_rows(base_index(), date_choice, aircraft_list or [], flight_list or [])
+
+
+TASK_COLUMNS = [
+    "flight_number_meridian", "airfcraft_meridian", "task_name",
+    "departure_fact_meridian", "arrival_fact_meridian",
+    "actual_duration_minutes", "estimated_duration_minutes",
+    "started_at", "completed_at", "delay_flag",
+]
+_INGEST_LOCK = threading.Lock()
+
+
+@contextmanager
+def ingest_paused():
+    """Hold off task-event ingestion, and the in-place writes it makes, until the block exits."""
+    with _INGEST_LOCK:
+        yield
+
+
+def empty_task_rows() -> pd.DataFrame:
+    """No task rows, with the column types of derived ones (what an empty source or filter returns)."""
+    times = (*TIME_INDEX_COLUMNS, "started_at", "completed_at")
+    dtypes = {c: "datetime64[ns]" if c in times else np.int64 if c.endswith("_minutes") else _TEXT_DTYPE
+              for c in TASK_COLUMNS if c != "delay_flag"}
+    return derive_task_columns(pd.DataFrame({c: pd.Series(dtype=t) for c, t in dtypes.items()}))
+
+
+def _event_frame(events) -> pd.DataFrame:
+    ev = events.copy() if isinstance(events, pd.DataFrame) else pd.DataFrame(list(events))
+    if "task_id" not in ev.columns:
+        ev["task_id"] = np.nan
+    return ev.reset_index(drop=True)
+
+
+def _derive_touched(rows: pd.DataFrame, provided: pd.DataFrame, with_text: bool = True) -> pd.DataFrame:
+    """Recompute derived columns for touched rows; values given in the event win."""
+    times_given = provided.reindex(columns=["started_at", "completed_at"]).notna().any(axis=1)
+    recompute_act = times_given & provided.reindex(columns=["actual_duration_minutes"]).isna().iloc[:, 0]
+    if recompute_act.any():
+        # On float64, whatever the stored width, so a task still in progress (no completed_at)
+        # gets missing minutes; _conform casts back (int32 in the compact dataset).
+        span = rows.loc[recompute_act, "completed_at"] - rows.loc[recompute_act, "started_at"]
+        minutes = rows["actual_duration_minutes"].astype(np.float64)
+        minutes[recompute_act] = span.dt.total_seconds() // 60
+        rows["actual_duration_minutes"] = minutes
+    if with_text:
+        rows["duration_text"] = _duration_text(rows)
+    given_flag = provided.reindex(columns=["delay_flag"]).iloc[:, 0]
+    rows["delay_flag"] = given_flag.where(given_flag.notna(), _delay_flags(rows)).astype(int)
+    return rows
+
+
+def _conform(rows: pd.DataFrame, chunks: list) -> pd.DataFrame:
+    """Cast ``rows`` to the base frame's dtypes, first widening the columns of every chunk that cannot hold them.
+
+    Unseen values are added to categoricals. An integer column receiving missing values
+    (minutes of a task still in progress) becomes float64, as a database source reads it.
+    """
+    base = chunks[0]
+    for c in base.columns:
+        if isinstance(base[c].dtype, pd.CategoricalDtype):
+            unseen = pd.Index(rows[c].dropna().unique()).difference(base[c].cat.categories)
+            if len(unseen):
+                for chunk in chunks:
+                    chunk[c] = chunk[c].cat.add_categories(unseen)
+        elif pd.api.types.is_integer_dtype(base[c].dtype) and rows[c].isna().any():
+            for chunk in chunks:
+                chunk[c] = chunk[c].astype(np.float64)
+    return rows[base.columns].astype(base.dtypes.to_dict())
+
+
+def _row_positions(index: dict, labels) -> np.ndarray:
+    """Row positions of the index labels ``labels`` in the frame and its appended chunks; -1 when unknown."""
+    found = np.full(len(labels), -1, dtype=np.intp)
+    labels = pd.Series(labels).reset_index(drop=True).dropna()
+    if labels.dtype.kind == "f" and (labels % 1 == 0).all():
+        # Ids mixed with missing ones arrive as floats, which an integer index can only match by a full scan.
+        labels = labels.astype(np.int64)
+    at, offset = labels.index.to_numpy(), 0
+    for chunk in (index["frame"], *index["tail"]):
+        hit = chunk.index.get_indexer(labels)
+        known = (found[at] < 0) & (hit >= 0)
+        found[at[known]] = hit[known] + offset
+        offset += len(chunk)
+    return found
+
+
+def _write_rows(index: dict, positions: np.ndarray, rows: pd.DataFrame):
+    """Write the columns of ``rows`` over the rows at sorted ``positions``, chunk by chunk."""
+    offset = 0
+    for chunk in (index["frame"], *index["tail"]):
+        local = positions - offset
+        hit = (local >= 0) & (local < len(chunk))
+        if hit.any():
+            for c in rows.columns:
+                if isinstance(chunk[c].dtype, pd.StringDtype):
+                    # Arrow-backed text is rebuilt whole on every write; as objects a write costs its own rows.
+                    chunk[c] = chunk[c].astype(object)
+                chunk.iloc[local[hit], chunk.columns.get_loc(c)] = rows[c].to_numpy()[hit]
+        offset += len(chunk)
+
+
+def ingest_task_events(events) -> dict:
+    """Append or upsert task rows without rebuilding the dataset.
+
+    ``events`` is a DataFrame or iterable of dicts with any of ``TASK_COLUMNS``.
+    An event whose ``task_id`` (base frame index label) exists updates that task;
+    missing columns keep their stored values, and events for the same task in one
+    batch are merged column by column in order. Any other event is appended as a new
+    task and must carry the full schema; its ``task_id``, when given, becomes the new
+    row's label, otherwise the next free label is assigned. The result lists the
+    appended tasks' ids under "ids", in event order, for completing them later.
+
+    Only the cells that change are written, and appended rows collect in chunks
+    after the base frame (see fold_index). Derived columns, the base index and
+    cached pivots are patched only for the touched rows and flights.
+    """
+    global _BASE_DF
+    ev = _event_frame(events)
+    if ev.empty:
+        return {"updated": 0, "appended": 0, "ids": [], "version": _DATA_VERSION}
+
+    with _INGEST_LOCK:
+        index = base_index()
+        if _SNAPSHOT_STATE["mapped"]:
+            # Mapped snapshot columns are read-only; this process keeps a private copy from here on.
+            base = index["frame"].copy()
+            with _SNAPSHOT_LOCK:
+                _BASE_DF = base
+                index["frame"] = base
+                _SNAPSHOT_STATE["mapped"] = False
+        chunks = [index["frame"], *index["tail"]]
+        cols = [c for c in TASK_COLUMNS if c in ev.columns]
+        with_text = "duration_text" in chunks[0].columns
+
+        found = _row_positions(index, ev["task_id"])
+        # Several events for one task merge column-wise: the last value given for each column wins.
+        upd = ev[found >= 0].assign(position=found[found >= 0])
+        upd = upd.groupby("task_id", sort=False).last().sort_values("position")
+        new = ev[found < 0]
+        affected = set()
+
+        if len(upd):
+            positions = upd["position"].to_numpy()
+            old_rows = index_rows(index, positions)
+            provided = upd[cols]
+            rows = provided.combine_first(old_rows).reindex(index=old_rows.index, columns=old_rows.columns)
+            rows = _conform(_derive_touched(rows, provided, with_text), chunks)
+            changed = [c for c in rows.columns if not rows[c].equals(old_rows[c])]
+            _write_rows(index, positions, rows[changed])
+            _update_base_index(index, positions, old_rows, rows)
+            affected |= _board_keys(old_rows) | _board_keys(rows)
+
+        appended = []
+        if len(new):
+            if index["next_id"] is None:
+                index["next_id"] = max((int(chunk.index.max()) + 1 for chunk in chunks if len(chunk)), default=0)
+            ids = pd.to_numeric(new["task_id"])
+            start = max(index["next_id"], int(ids.max()) + 1 if ids.notna().any() else 0)
+            missing = ids.isna().to_numpy()
+            ids[missing] = np.arange(start, start + missing.sum())
+            rows = new[cols].assign(task_id=ids.astype(np.int64).to_numpy()).groupby("task_id", sort=False).last()
+            rows = rows.rename_axis(None)
+            rows = _conform(_derive_touched(rows.copy(), rows, with_text), chunks)
+            index["next_id"] = max(start, int(rows.index.max()) + 1)
+            appended = rows.index.tolist()
+            first = _row_count(index)
+            with _SNAPSHOT_LOCK:
+                index["tail"] = index["tail"] + [rows]
+            _update_base_index(index, np.arange(first, first + len(rows)), None, rows)
+            affected |= _board_keys(rows)
+
+        fold_index(index)
+        version = _patch_pivot_cache({(a, f) for a, f in affected if pd.notna(a) and pd.notna(f)})
+    return {"updated": len(upd), "appended": len(appended), "ids": appended, "version": version}
+
+
+def _board_keys(rows: pd.DataFrame) -> set:
+    """The ``(aircraft, flight)`` board rows that ``rows`` contribute to."""
+    return set(zip(rows["airfcraft_meridian"], rows["flight_number_meridian"]))
+
+
+def _patch_pivot_cache(affected: set) -> int:
+    """Bump the data version, carrying cached pivots over with only the affected board rows recomputed."""
+    global _DATA_VERSION
+    with _PIVOT_CACHE_LOCK:
+        old_version = _DATA_VERSION
+        entries = [(k, v) for k, v in _PIVOT_CACHE.items() if k[-1] == old_version]
+
+    today = pd.Timestamp("today").normalize()
+    patched = []
+    for key, cached in entries:
+        tab, (date_choice, day), aircraft_t, flight_t, _ = key
+        if day is not None and day != today:
+            continue
+        keys = {(a, f) for a, f in affected if (not aircraft_t or a in aircraft_t) and (not flight_t or f in flight_t)}
+        board = _patch_board(cached, tab, date_choice, keys) if keys else cached
+        if board is not None:
+            patched.append((key[:-1] + (old_version + 1,), board))
+
+    with _PIVOT_CACHE_LOCK:
+        _DATA_VERSION = old_version + 1
+        _PIVOT_CACHE.clear()
+        for key, board in patched:
+            _PIVOT_CACHE[key] = board
+        _PIVOT_CACHE_STATS["patched"] += len(patched)
+    return _DATA_VERSION
+
+
+# Up to this many touched rows are spliced into a cached board, reusing the untouched
+# runs between them (Arrow text shares their buffers, one chunk per run); larger
+# patches, or boards split into more than _BOARD_PIECES runs, are gathered in one pass.
+_SPLICE_ROWS = 32
+_BOARD_PIECES = 1024
+
+
+def _board_position(tails, flts, key) -> int:
+    """Where ``(aircraft, flight)`` sorts among a board's rows, by binary search on its two key columns."""
+    lo = bisect.bisect_left(tails, key[0])
+    return bisect.bisect_left(flts, key[1], lo, bisect.bisect_right(tails, key[0], lo))
+
+
+def _patch_board(cached: pd.DataFrame, tab: str, date_choice: str, keys: set):
+    """Put recomputed ``(aircraft, flight)`` rows in place in a cached board; None if its layout would change.
+
+    Rows are found by binary search on the board's sort order, so a patch never re-sorts the board.
+    """
+    fresh = _compute_pivot(tab, date_choice, sorted({a for a, _ in keys}), sorted({f for _, f in keys}))
+    if not set(fresh.columns) <= set(cached.columns):
+        return None
+    fill = {c: (0 if c.endswith("_delay") else "") for c in cached.columns if c not in fresh.columns}
+    fresh = fresh[[k in keys for k in zip(fresh["Aircraft number"], fresh["Flight number"])]]
+    fresh = fresh.reindex(columns=cached.columns).fillna(fill).reset_index(drop=True)
+    fresh = fresh.astype({c: t for c, t in cached.dtypes.items() if fresh[c].dtype != t})
+
+    # Element lookups on Arrow text are slow, so a large patch converts the key columns once instead.
+    small = len(keys) <= _SPLICE_ROWS
+    tails, flts = (cached[c].array if small else cached[c].to_numpy() for c in ("Aircraft number", "Flight number"))
+    gone = []
+    for key in sorted(keys):
+        pos = _board_position(tails, flts, key)
+        if pos < len(cached) and (tails[pos], flts[pos]) == key:
+            gone.append(pos)
+    at = [_board_position(tails, flts, key) for key in zip(fresh["Aircraft number"], fresh["Flight number"])]
+
+    pieces = cached.attrs.get("pieces", 1) + len(gone) + len(at)
+    if small and pieces <= _BOARD_PIECES:
+        # At one position the fresh rows go first, then the stale row there is skipped.
+        runs, start = [], 0
+        for pos, drop, i in sorted([(p, 0, i) for i, p in enumerate(at)] + [(p, 1, -1) for p in gone]):
+            if pos > start:
+                runs.append(cached.iloc[start:pos])
+            start = pos + 1 if drop else pos
+            if not drop:
+                runs.append(fresh.iloc[i:i + 1])
+        runs.append(cached.iloc[start:])
+        board = pd.concat(runs, ignore_index=True)
+    else:
+        kept = np.delete(np.arange(len(cached)), gone)
+        order = np.insert(kept, np.searchsorted(kept, at), len(cached) + np.arange(len(fresh)))
+        board = pd.concat([cached, fresh], ignore_index=True).take(order).reset_index(drop=True)
+        pieces = 1
+    board.attrs["pieces"] = pieces
+
+    # A task column left without durations drops out of a rebuilt board; only a column whose
+    # removed cells held some and whose fresh cells hold none can have become empty.
+    blank = [t for t in _tab_layout(tab)[0] if t in board.columns and (fresh[t] == "").all()]
+    emptied = [t for t in blank if any(cached[t].array[p] != "" for p in gone)]
+    if board.empty or any((board[t] == "").all() for t in emptied):
+        return None
+    return board
+
+
+TIME_INDEX_COLUMNS = ("arrival_fact_meridian", "departure_fact_meridian")
+# Appended rows (the index's "tail" chunks) and moved or appended times (its
+# "by_time_recent" runs) are merged into the frame and the main time orders once
+# they exceed this share of the rows, so a batch costs its own size rather than
+# a copy of the dataset.
+_FOLD_SHARE = 1 / 16
+_FOLD_MIN_ROWS = 4096
+_TAIL_CHUNKS = 32
+
+
+def _time_order(s: pd.Series):
+    """``(times, positions)``: the column's non-missing timestamps in ascending order and their row positions."""
+    values = s.to_numpy(dtype="datetime64[ns]")
+    present = np.flatnonzero(~np.isnat(values))
+    order = np.argsort(values[present], kind="stable")
+    return values[present][order], present[order]
+
+
+def _no_recent_times() -> dict:
+    """Empty ``(times, positions, stale)`` runs per time column: nothing moved since the main orders were built."""
+    empty = np.empty(0, dtype=np.intp)
+    return {col: (np.empty(0, dtype="datetime64[ns]"), empty, empty) for col in TIME_INDEX_COLUMNS}
+
+
+def _row_count(index: dict) -> int:
+    with _SNAPSHOT_LOCK:
+        return len(index["frame"]) + sum(map(len, index["tail"]))
+
+
+def index_rows(index: dict, positions: np.ndarray = None, columns: list = None) -> pd.DataFrame:
+    """Rows at sorted ``positions`` (None: all rows) of the index's frame and its appended chunks."""
+    with _SNAPSHOT_LOCK:
+        chunks = [index["frame"], *index["tail"]]
+    if columns is not None:
+        chunks = [chunk[columns] for chunk in chunks]
+    if positions is None:
+        return pd.concat(chunks) if len(chunks) > 1 else chunks[0]
+    if len(chunks) == 1:
+        return chunks[0].take(positions)
+    starts = np.cumsum([0] + [len(chunk) for chunk in chunks[:-1]])
+    which = np.searchsorted(starts, positions, "right") - 1
+    return pd.concat([chunk.take(positions[which == i] - starts[i]) for i, chunk in enumerate(chunks)])
+
+
+def _time_slices(times: np.ndarray, positions: np.ndarray, bounds: np.ndarray) -> list:
+    lo, hi = np.searchsorted(times, bounds[:, 0]), np.searchsorted(times, bounds[:, 1])
+    return [positions[a:b] for a, b in zip(lo, hi) if b > a]
+
+
+def _without(positions: np.ndarray, stale: np.ndarray) -> np.ndarray:
+    """``positions`` minus the sorted ``stale`` ones."""
+    if not len(stale):
+        return positions
+    at = np.minimum(np.searchsorted(stale, positions), len(stale) - 1)
+    return positions[stale[at] != positions]
+
+
+def _time_positions(index: dict, windows: list) -> np.ndarray:
+    """Sorted positions of rows whose arrival or departure falls in any window, by binary search."""
+    bounds = np.array(windows, dtype="datetime64[ns]").reshape(-1, 2)
+    with _SNAPSHOT_LOCK:
+        runs = [(index["by_time"][col], index["by_time_recent"][col]) for col in TIME_INDEX_COLUMNS]
+        n_rows = _row_count(index)
+    parts = []
+    for (times, positions), (recent_times, recent_positions, stale) in runs:
+        parts.extend(_without(part, stale) for part in _time_slices(times, positions, bounds))
+        parts.extend(_time_slices(recent_times, recent_positions, bounds))
+    if not parts:
+        return np.empty(0, dtype=np.intp)
+    if sum(map(len, parts)) * 16 < n_rows:
+        return np.unique(np.concatenate(parts))
+    # Wide windows: marking a mask is linear, sorting the matches is not.
+    hit = np.zeros(n_rows, dtype=bool)
+    for part in parts:
+        hit[part] = True
+    return np.flatnonzero(hit)
+
+
+def _update_time_index(index: dict, positions: np.ndarray, old_rows, new_rows: pd.DataFrame):
+    """Move the given row positions whose times changed into each column's recent run.
+
+    Their entries in the main order are marked stale rather than deleted; fold_index
+    merges the recent run back once it grows.
+    """
+    positions = np.asarray(positions)
+    for col in TIME_INDEX_COLUMNS:
+        new_times = new_rows[col].to_numpy(dtype="datetime64[ns]")
+        moved = np.ones(len(positions), dtype=bool)
+        times, order, stale = index["by_time_recent"][col]
+        if old_rows is not None:
+            old_times = old_rows[col].to_numpy(dtype="datetime64[ns]")
+            moved = (old_times != new_times) & ~(np.isnat(old_times) & np.isnat(new_times))
+            if not moved.any():
+                continue
+            in_main = moved & ~np.isnat(old_times) & ~np.isin(positions, order)
+            stale = np.union1d(stale, positions[in_main])
+        keep = ~np.isin(order, positions[moved])
+        times, order = times[keep], order[keep]
+        added = moved & ~np.isnat(new_times)
+        by_time = np.argsort(new_times[added], kind="stable")
+        new_times, new_positions = new_times[added][by_time], positions[added][by_time]
+        at = np.searchsorted(times, new_times, "right")
+        with _SNAPSHOT_LOCK:
+            index["by_time_recent"][col] = (np.insert(times, at, new_times), np.insert(order, at, new_positions), stale)
+
+
+def fold_index(index: dict, force: bool = False):
+    """Merge appended chunks into the frame and recent times into the main orders once they pass _FOLD_SHARE.
+
+    ``force`` merges whatever is pending. Positions do not change, so readers holding
+    positions from before a fold still find the same rows. Call with _INGEST_LOCK held
+    (inside ingest_paused() from other modules).
+    """
+    global _BASE_DF
+    limit = max(_FOLD_MIN_ROWS, int(len(index["frame"]) * _FOLD_SHARE))
+    tail = index["tail"]
+    if tail and (force or sum(map(len, tail)) > limit):
+        frame = pd.concat([index["frame"], *tail])
+        with _SNAPSHOT_LOCK:
+            if _BASE_INDEX is index:
+                _BASE_DF = frame
+            index["frame"], index["tail"] = frame, []
+    elif len(tail) > _TAIL_CHUNKS:
+        with _SNAPSHOT_LOCK:
+            index["tail"] = [pd.concat(tail)]
+    for col in TIME_INDEX_COLUMNS:
+        recent_times, recent_positions, stale = index["by_time_recent"][col]
+        if not (len(recent_times) or len(stale)) or not (force or len(recent_times) + len(stale) > limit):
+            continue
+        times, positions = index["by_time"][col]
+        if len(stale):
+            keep = ~np.isin(positions, stale)
+            times, positions = times[keep], positions[keep]
+        at = np.searchsorted(times, recent_times, "right")
+        with _SNAPSHOT_LOCK:
+            index["by_time"][col] = (np.insert(times, at, recent_times), np.insert(positions, at, recent_positions))
+            index["by_time_recent"][col] = _no_recent_times()[col]
+
+
+def _positions_by_code(codes: np.ndarray, labels) -> dict:
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(len(labels) + 1))
+    return {label: order[bounds[i]:bounds[i + 1]] for i, label in enumerate(labels)}
+
+
+def build_base_index(df: pd.DataFrame, filters: bool = True, lookups: dict = None) -> dict:
+    """Precompute sorted row positions per aircraft and flight, and arrival/departure time order, for one base frame.
+
+    ``filters=False`` skips the aircraft<->flight adjacency when only row lookups are needed.
+    ``lookups`` supplies the "by_aircraft", "by_flight" and "by_time" entries instead,
+    e.g. as restored by base_cache.
+    """
+    if lookups is None:
+        aircraft_codes, aircraft = pd.factorize(df["airfcraft_meridian"])
+        flight_codes, flights = pd.factorize(df["flight_number_meridian"])
+        lookups = {
+            "by_aircraft": _positions_by_code(aircraft_codes, aircraft),
+            "by_flight": _positions_by_code(flight_codes, flights),
+            "by_time": {col: _time_order(df[col]) for col in TIME_INDEX_COLUMNS},
+        }
+
+    return {
+        "frame": df,
+        **lookups,
+        "by_time_recent": _no_recent_times(),
+        "tail": [],  # frames of rows appended since, positioned after "frame"
+        "next_id": None,  # row label for the next appended task without one, found on first append
+        "filters": FilterIndex.from_frame(df) if filters else None,
+        "delays": {},  # DelayCube per threshold, built by delay_cube() on first use
+    }
+
+
+def _row_index_keys(rows: pd.DataFrame) -> dict:
+    return {
+        "by_aircraft": [[v] for v in rows["airfcraft_meridian"]],
+        "by_flight": [[v] for v in rows["flight_number_meridian"]],
+    }
+
+
+def _update_base_index(index: dict, positions: np.ndarray, old_rows, new_rows: pd.DataFrame):
+    """Move the given row positions from their old index keys to their new ones."""
+    for aggregate in [a for a in (index["filters"], *index["delays"].values()) if a is not None]:
+        if old_rows is not None:
+            aggregate.remove_rows(old_rows)
+        aggregate.add_rows(new_rows)
+    old_keys = _row_index_keys(old_rows) if old_rows is not None else None
+    new_keys = _row_index_keys(new_rows)
+    _update_time_index(index, positions, old_rows, new_rows)
+    for name, lookup in ((n, index[n]) for n in ("by_aircraft", "by_flight")):
+        drop, add = {}, {}
+        for i, pos in enumerate(positions):
+            before = set(old_keys[name][i]) if old_keys is not None else set()
+            after = set(new_keys[name][i])
+            for k in before - after:
+                drop.setdefault(k, []).append(pos)
+            for k in after - before:
+                add.setdefault(k, []).append(pos)
+        for k, pos in drop.items():
+            if pd.notna(k) and k in lookup:
+                lookup[k] = np.setdiff1d(lookup[k], pos, assume_unique=True)
+        for k, pos in add.items():
+            if pd.notna(k):
+                lookup[k] = np.union1d(lookup.get(k, np.empty(0, dtype=np.intp)), pos)
+
+
+def base_index() -> dict:
+    """Index of the current base frame; its "frame" entry is the matching snapshot."""
+    global _BASE_INDEX
+    with _SNAPSHOT_LOCK:
+        base = _get_base_df()
+        if _BASE_INDEX is None or _BASE_INDEX["frame"] is not base:
+            _BASE_INDEX = build_base_index(base)
+        return _BASE_INDEX
+
+
+DELAY_CUBES = 4
+
+
+def delay_cube(threshold: float = None) -> DelayCube:
+    """Delay aggregates of the base dataset at ``threshold`` (default DELAY_ANALYTICS_THRESHOLD).
+
+    Built on first use per threshold (the last DELAY_CUBES are kept) and updated by ingestion.
+    """
+    threshold = DELAY_ANALYTICS_THRESHOLD if threshold is None else float(threshold)
+    with _INGEST_LOCK:
+        index = base_index()
+        cubes = index["delays"]
+        cube = cubes.get(threshold)
+        if cube is None:
+            cube = cubes[threshold] = DelayCube.from_frame(index_rows(index), threshold, TASKS_ARRIVAL, TASKS_DEPARTURE)
+            while len(cubes) > DELAY_CUBES:
+                del cubes[next(iter(cubes))]
+        return cube
+
+
+def _union_positions(lookup: dict, keys: list) -> np.ndarray:
+    parts = [lookup[k] for k in set(keys) if k in lookup]
+    return np.unique(np.concatenate(parts)) if parts else np.empty(0, dtype=np.intp)
+
+
+def _filter_positions(index: dict, date_choice: str, aircraft_list: list, flight_list: list):
+    """Sorted row positions matching the filters, or None when nothing is filtered."""
+    selected = []
+    windows = time_windows(date_choice)
+    if windows is not None:
+        selected.append(_time_positions(index, windows))
+    if aircraft_list:
+        selected.append(_union_positions(index["by_aircraft"], aircraft_list))
+    if flight_list:
+        selected.append(_union_positions(index["by_flight"], flight_list))
+
+    if not selected:
+        return None
+    positions = selected[0]
+    for other in selected[1:]:
+        positions = np.intersect1d(positions, other, assume_unique=True)
+    return positions
 
 
 def _apply_filters(df: pd.DataFrame, date_choice: str, aircraft_list: list, flight_list: list) -> pd.DataFrame:
+    """Filter task rows; the base frame is served from its index without copying it."""
+    index = base_index()
+    if df is not index["frame"]:
+        return _scan_filters(df, date_choice, aircraft_list, flight_list)
+    return filtered_rows(index, date_choice, aircraft_list, flight_list)
+
+
+def filtered_rows(index: dict, date_choice: str, aircraft_list: list, flight_list: list) -> pd.DataFrame:
+    """Rows of ``index`` (e.g. base_index()) that the board filters select, found through its lookups."""
+    return index_rows(index, _filter_positions(index, date_choice, aircraft_list, flight_list))
+
+
+def _scan_filters(df: pd.DataFrame, date_choice: str, aircraft_list: list, flight_list: list) -> pd.DataFrame:
     dd = df.copy()
 
-    if date_choice == "Today":
-        today = pd.Timestamp("today").normalize()
-        dd = dd[(dd["arrival_fact_meridian"].dt.normalize() == today) |
-                (dd["departure_fact_meridian"].dt.normalize() == today)]
-    elif date_choice == "Yesterday":
-        y = (pd.Timestamp("today").normalize() - pd.Timedelta(days=1))
-        dd = dd[(dd["arrival_fact_meridian"].dt.normalize() == y) |
-                (dd["departure_fact_meridian"].dt.normalize() == y)]
+    windows = time_windows(date_choice)
+    if windows is not None:
+        arrival, departure = dd["arrival_fact_meridian"], dd["departure_fact_meridian"]
+        hit = np.zeros(len(dd), dtype=bool)
+        for start, end in windows:
+            hit |= (((arrival >= start) & (arrival < end)) | ((departure >= start) & (departure < end))).to_numpy()
+        dd = dd[hit]
 
     if aircraft_list:
         dd = dd[dd["airfcraft_meridian"].isin(aircraft_list)]
@@ -132,148 +1076,271 @@ def _apply_filters(df: pd.DataFrame, date_choice: str, aircraft_list: list, flig
     return dd
 
 
-def distinct_aircraft(date_choice: str, chosen_flights: list) -> list:
-    base = _get_base_df()
-    dd = _apply_filters(base, date_choice, [], chosen_flights or [])
-    return sorted(dd["airfcraft_meridian"].dropna().unique().tolist())
+def _distinct_in_windows(index: dict, windows: list, column: str, other: str, chosen: list) -> list:
+    """Values of ``column`` on rows in the windows (None: all rows), restricted to rows whose ``other`` is in ``chosen``."""
+    rows = index_rows(index, None if windows is None else _time_positions(index, windows), [column, other])
+    values, others = rows[column], rows[other]
+    if chosen:
+        values = values[others.isin(chosen).to_numpy()]
+    return sorted(values.dropna().unique())
+
+
+def distinct_aircraft(date_choice, chosen_flights: list) -> list:
+    if _DATA_SOURCE is not None:
+        return _DATA_SOURCE.distinct("airfcraft_meridian", date_choice, [], chosen_flights or [])
+    index, windows = base_index(), time_windows(date_choice)
+    day = _single_day(windows)
+    if index["filters"] is None or (windows is not None and day is None):
+        return _distinct_in_windows(index, windows, "airfcraft_meridian", "flight_number_meridian", chosen_flights)
+    return index["filters"].aircraft(ALL_DAYS if day is None else day, chosen_flights)
+
 
+def distinct_flights(date_choice, chosen_aircraft: list) -> list:
+    if _DATA_SOURCE is not None:
+        return _DATA_SOURCE.distinct("flight_number_meridian", date_choice, chosen_aircraft or [], [])
+    index, windows = base_index(), time_windows(date_choice)
+    day = _single_day(windows)
+    if index["filters"] is None or (windows is not None and day is None):
+        return _distinct_in_windows(index, windows, "flight_number_meridian", "airfcraft_meridian", chosen_aircraft)
+    return index["filters"].flights(ALL_DAYS if day is None else day, chosen_aircraft)
 
-def distinct_flights(date_choice: str, chosen_aircraft: list) -> list:
-    base = _get_base_df()
-    dd = _apply_filters(base, date_choice, chosen_aircraft or [], [])
-    return sorted(dd["flight_number_meridian"].dropna().unique().tolist())
+
+def _date_bucket(date_choice: str):
+    if date_choice in ("Today", "Yesterday"):
+        return date_choice, pd.Timestamp("today").normalize()
+    return date_choice, None
+
+
+def pivot_cache_key(selected_table: str, date_choice: str, aircraft_list: list, flight_list: list) -> tuple:
+    return (
+        selected_table,
+        _date_bucket(date_choice),
+        tuple(sorted(set(aircraft_list or []))),
+        tuple(sorted(set(flight_list or []))),
+        _DATA_VERSION,
+    )
 
 
 def pivot_table(selected_table: str, date_choice: str, aircraft_list: list, flight_list: list) -> pd.DataFrame:
-    base = _get_base_df()
-    dd = _apply_filters(base, date_choice, aircraft_list or [], flight_list or [])
+    key = pivot_cache_key(selected_table, date_choice, aircraft_list, flight_list)
+    with _PIVOT_CACHE_LOCK:
+        cached = _PIVOT_CACHE.get(key)
+        if cached is not None:
+            _PIVOT_CACHE.move_to_end(key)
+            _PIVOT_CACHE_STATS["hits"] += 1
+            return cached.copy()
+        _PIVOT_CACHE_STATS["misses"] += 1
 
-    key_cols = ["airfcraft_meridian", "flight_number_meridian"]
+    result = _compute_pivot(selected_table, date_choice, aircraft_list, flight_list)
 
-    if selected_table == "departure":
-        keep = TASKS_DEPARTURE
-        delay_prefix = "Departure_"
-        ddf = dd[dd["task_name"].isin(keep)].copy()
+    with _PIVOT_CACHE_LOCK:
+        if key[-1] == _DATA_VERSION:
+            _PIVOT_CACHE[key] = result
+            _PIVOT_CACHE.move_to_end(key)
+            while len(_PIVOT_CACHE) > PIVOT_CACHE_SIZE:
+                _PIVOT_CACHE.popitem(last=False)
+                _PIVOT_CACHE_STATS["evictions"] += 1
+    return result.copy()
 
-    elif selected_table == "arrival":
-        keep = TASKS_ARRIVAL
-        delay_prefix = "Arrival_"
-        ddf = dd[dd["task_name"].isin(keep)].copy()
 
-    else:
-        keep = list(set(TASKS_ARRIVAL + TASKS_DEPARTURE))
-        delay_prefix = ""
-        ddf = dd.copy()
+def _compute_pivot(selected_table: str, date_choice: str, aircraft_list: list, flight_list: list) -> pd.DataFrame:
+    if _DATA_SOURCE is not None and hasattr(_DATA_SOURCE, "iter_chunks"):
+        return pivot_chunks(_DATA_SOURCE.iter_chunks(date_choice, aircraft_list or [], flight_list or []),
+                            selected_table)
+    return pivot_frame(_fetch_filtered(date_choice, aircraft_list, flight_list), selected_table)
+
 
-    dur = ddf.pivot_table(
-        index=key_cols,
-        columns="task_name",
-        values="duration_text",
-        aggfunc="max"
-    ).reset_index()
+KEY_COLS = ["airfcraft_meridian", "flight_number_meridian"]
 
+
+def _tab_layout(selected_table: str):
+    """Ordered task slots, delay column prefix and flight time columns for one tab."""
+    if selected_table == "departure":
+        return TASKS_DEPARTURE, "Departure_", {"Time of Departure": "departure_fact_meridian"}
     if selected_table == "arrival":
-        times_df = ddf.groupby(key_cols, as_index=False)["arrival_fact_meridian"].first()
-        times_df["Time of Arrival"] = times_df["arrival_fact_meridian"].dt.strftime("%H:%M")
-        times_df = times_df.drop(columns=["arrival_fact_meridian"])
-        merged = dur.merge(times_df, on=key_cols, how="left")
+        return TASKS_ARRIVAL, "Arrival_", {"Time of Arrival": "arrival_fact_meridian"}
+    return (list(dict.fromkeys(TASKS_ARRIVAL + TASKS_DEPARTURE)), "",
+            {"Time of Arrival": "arrival_fact_meridian", "Time of Departure": "departure_fact_meridian"})
 
-    elif selected_table == "departure":
-        times_df = ddf.groupby(key_cols, as_index=False)["departure_fact_meridian"].first()
-        times_df["Time of Departure"] = times_df["departure_fact_meridian"].dt.strftime("%H:%M")
-        times_df = times_df.drop(columns=["departure_fact_meridian"])
-        merged = dur.merge(times_df, on=key_cols, how="left")
 
+def _sorted_codes(s: pd.Series):
+    """``pd.factorize(s, sort=True)``; categoricals are ranked from their codes instead of hashing values."""
+    if not isinstance(s.dtype, pd.CategoricalDtype):
+        return pd.factorize(s, sort=True)
+    cats = s.cat.categories
+    order = cats.argsort()
+    rank = np.empty(len(cats), dtype=np.int64)
+    rank[order] = np.arange(len(cats))
+    codes = s.cat.codes.to_numpy()
+    return np.where(codes >= 0, rank[codes], -1), cats.take(order)
+
+
+def _slot_codes(names: pd.Series, task_pos: dict, other: int) -> np.ndarray:
+    if isinstance(names.dtype, pd.CategoricalDtype):
+        slot_of = names.cat.categories.map(task_pos).fillna(other).to_numpy(dtype=np.int64)
+        codes = names.cat.codes.to_numpy()
+        return np.where(codes >= 0, slot_of[codes], other)
+    return names.map(task_pos).fillna(other).to_numpy(dtype=np.int64)
+
+
+def pivot_frame(dd: pd.DataFrame, selected_table: str) -> pd.DataFrame:
+    """Pivot already-filtered task rows into the board layout of one tab.
+
+    Durations, delay flags and flight times are resolved from a single groupby over
+    (aircraft, flight, task slot) codes and scattered into per-tab grids.
+    """
+    tasks, delay_prefix, time_cols = _tab_layout(selected_table)
+    task_pos = {t: i for i, t in enumerate(tasks)}
+    n_slots = len(tasks) + 1  # last slot collects tasks outside the tab layout
+
+    if selected_table in ("departure", "arrival"):
+        dd = dd[dd["task_name"].isin(tasks)]
+
+    tail_codes, tails = _sorted_codes(dd["airfcraft_meridian"])
+    flt_codes, flts = _sorted_codes(dd["flight_number_meridian"])
+    valid = (tail_codes >= 0) & (flt_codes >= 0)
+    pair_codes = tail_codes.astype(np.int64) * max(len(flts), 1) + flt_codes
+    key_ids, key_codes = np.unique(pair_codes[valid], return_inverse=True)
+    slot_codes = _slot_codes(dd["task_name"], task_pos, len(tasks))[valid]
+
+    # Durations are ranked so the per-cell max is an integer reduction; -1 marks missing text.
+    # Compact frames carry no duration_text, so only the winning cells are formatted.
+    if "duration_text" in dd.columns:
+        dur_rank, dur_texts = pd.factorize(dd["duration_text"], sort=True)
+        dur_text = np.asarray(dur_texts, dtype=object).take
     else:
-        times_df = (
-            ddf.groupby(key_cols, as_index=False)
-            .agg(arrival_fact_meridian=("arrival_fact_meridian", "first"),
-                 departure_fact_meridian=("departure_fact_meridian", "first"))
-        )
-        times_df["Time of Arrival"] = times_df["arrival_fact_meridian"].dt.strftime("%H:%M")
-        times_df["Time of Departure"] = times_df["departure_fact_meridian"].dt.strftime("%H:%M")
-        times_df = times_df.drop(columns=["arrival_fact_meridian", "departure_fact_meridian"])
-        merged = dur.merge(times_df, on=key_cols, how="left")
-
-    flg = ddf.pivot_table(
-        index=key_cols,
-        columns="task_name",
-        values="delay_flag",
-        aggfunc="max"
-    ).reset_index()
-
-    if delay_prefix:
-        flg = flg.rename(columns={c: f"{delay_prefix}{c}_delay" for c in flg.columns if c not in key_cols})
-    else:
-        flg = flg.rename(columns={c: f"{c}_delay" for c in flg.columns if c not in key_cols})
+        dur_rank, dur_text = _duration_rank(dd), _duration_rank_text
+    cells = (
+        pd.DataFrame({"dur": dur_rank[valid], "flag": dd["delay_flag"].to_numpy()[valid]})
+        .groupby(key_codes * n_slots + slot_codes, sort=False)
+        .max()
+    )
+    cell_key, cell_slot = np.divmod(cells.index.to_numpy(), n_slots)
 
-    merged = merged.merge(flg, on=key_cols, how="left")
+    has_dur = (cells["dur"] >= 0).to_numpy()
+    kept = np.zeros(len(key_ids), dtype=bool)
+    kept[cell_key[has_dur]] = True
+    row_of = np.cumsum(kept) - 1
+    n_rows = int(kept.sum())
 
-    merged = merged.rename(columns={
-        "airfcraft_meridian": "Aircraft number",
-        "flight_number_meridian": "Flight number",
-    })
+    out = {
+        "Aircraft number": tails.take(key_ids[kept] // max(len(flts), 1)).astype(_TEXT_DTYPE),
+        "Flight number": flts.take(key_ids[kept] % max(len(flts), 1)).astype(_TEXT_DTYPE),
+    }
 
-    first_cols = [c for c in ["Aircraft number", "Flight number"] if c in merged.columns]
+    times = {}
+    for label, src in time_cols.items():
+        vals = dd.loc[valid, src]
+        present = vals.notna().to_numpy()
+        first_keys, first_at = np.unique(key_codes[present], return_index=True)
+        col = pd.Series(pd.NaT, index=range(len(key_ids)), dtype=vals.dtype)
+        col.iloc[first_keys] = vals.to_numpy()[present][first_at]
+        times[label] = col[kept].dt.strftime("%H:%M").reset_index(drop=True)
 
-    if selected_table == "all":
+    on_board = kept[cell_key] & (cell_slot < len(tasks))
+    dur_grid = np.full((n_rows, len(tasks)), None, dtype=object)
+    flag_grid = np.zeros((n_rows, len(tasks)), dtype=np.int64)
+    rows, slots = row_of[cell_key[on_board]], cell_slot[on_board]
+    dur_ranks = cells["dur"].to_numpy()[on_board]
+    has_text = dur_ranks >= 0
+    flag_vals = cells["flag"].to_numpy(dtype=float)[on_board]
+    dur_grid[rows[has_text], slots[has_text]] = dur_text(dur_ranks[has_text])
+    flag_grid[rows, slots] = np.nan_to_num(flag_vals).astype(np.int64)
 
-        if "Time of Arrival" in merged.columns:
-            first_cols += ["Time of Arrival"]
+    dur_present = np.zeros(len(tasks), dtype=bool)
+    dur_present[slots[has_text]] = True
+    flag_present = np.zeros(len(tasks), dtype=bool)
+    flag_present[slots[~np.isnan(flag_vals)]] = True
 
-        ordered_tasks = TASKS_ARRIVAL + TASKS_DEPARTURE
-        seen = set()
-        task_cols = []
-        for t in ordered_tasks:
-            if t in merged.columns and t not in seen:
-                task_cols.append(t)
-                seen.add(t)
+    task_cols = []
+    for j, t in enumerate(tasks):
+        if dur_present[j]:
+            out[t] = pd.Series(dur_grid[:, j]).fillna("").astype(_TEXT_DTYPE)
+            task_cols.append(t)
+    delay_cols = []
+    for j, t in enumerate(tasks):
+        if flag_present[j]:
+            out[f"{delay_prefix}{t}_delay"] = flag_grid[:, j]
+            delay_cols.append(f"{delay_prefix}{t}_delay")
+    out.update(times)
 
-        tod_injected = False
-        if "Time of Departure" in merged.columns:
-            if "Refueling" in task_cols:
-                ref_idx = task_cols.index("Refueling") + 1
-                task_cols.insert(ref_idx, "Time of Departure")
-                tod_injected = True
-            else:
+    first_cols = ["Aircraft number", "Flight number"]
+    if "Time of Arrival" in times:
+        first_cols.append("Time of Arrival")
+    if "Time of Departure" in times:
+        if selected_table not in ("departure", "arrival") and "Refueling" in task_cols:
+            task_cols.insert(task_cols.index("Refueling") + 1, "Time of Departure")
+        else:
+            first_cols.append("Time of Departure")
 
-                first_cols += ["Time of Departure"]
+    return pd.DataFrame(out, index=pd.RangeIndex(n_rows))[first_cols + task_cols + delay_cols]
 
-        ordered_delays = [f"{t}_delay" for t in ordered_tasks]
-        seen_d = set()
-        delay_cols = []
-        for d in ordered_delays:
-            if d in merged.columns and d not in seen_d:
-                delay_cols.append(d)
-                seen_d.add(d)
 
-        final_cols = first_cols + task_cols + delay_cols
+FOLD_CHUNK_ROWS = 100_000
+_FOLD_COLUMNS = KEY_COLS + ["task_name", "delay_flag", "arrival_fact_meridian", "departure_fact_meridian"]
 
-    elif selected_table == "arrival":
-        task_cols = [t for t in TASKS_ARRIVAL if t in merged.columns]
-        delay_cols = [f"Arrival_{t}_delay" for t in TASKS_ARRIVAL if f"Arrival_{t}_delay" in merged.columns]
-        if "Time of Arrival" in merged.columns:
-            first_cols += ["Time of Arrival"]
-        final_cols = first_cols + task_cols + delay_cols
 
-    else:
-        task_cols = [t for t in TASKS_DEPARTURE if t in merged.columns]
-        delay_cols = [f"Departure_{t}_delay" for t in TASKS_DEPARTURE if f"Departure_{t}_delay" in merged.columns]
-        if "Time of Departure" in merged.columns:
-            first_cols += ["Time of Departure"]
-        final_cols = first_cols + task_cols + delay_cols
-
-    keep_set = set(final_cols)
-    merged = merged[[c for c in merged.columns if c in keep_set]]
-    merged = merged[final_cols]
-
-    for col in final_cols:
-        if col in merged.columns and col.endswith("_delay"):
-            merged[col] = merged[col].fillna(0).astype(int)
-
-    base_info = {"Aircraft number", "Flight number", "Time of Arrival", "Time of Departure"}
-    for col in final_cols:
-        if col in merged.columns and not col.endswith("_delay") and col not in base_info:
-            merged[col] = merged[col].fillna("")
-
-    return merged
+def _fold_rows(rows: pd.DataFrame, selected_table: str) -> pd.DataFrame:
+    """Reduce task rows to one row per (aircraft, flight, task) that pivots to the same board.
+
+    Each kept row is the cell's longest-sorting duration, carries the cell's max delay
+    flag and its flight's first arrival/departure time, so folding is associative in
+    row order: ``_fold_rows(concat([folded, more]))`` equals folding all rows at once.
+    """
+    tasks = _tab_layout(selected_table)[0]
+    if selected_table in ("departure", "arrival"):
+        rows = rows[rows["task_name"].isin(tasks)]
+    if "delay_flag" not in rows.columns:
+        rows = rows.assign(delay_flag=_delay_flags(rows))
+    rows = rows[rows["airfcraft_meridian"].notna().to_numpy() & rows["flight_number_meridian"].notna().to_numpy()]
+
+    has_text = "duration_text" in rows.columns
+    dur_rank = pd.factorize(rows["duration_text"], sort=True)[0] if has_text else _duration_rank(rows)
+    tail_codes, _ = _sorted_codes(rows["airfcraft_meridian"])
+    flt_codes, flts = _sorted_codes(rows["flight_number_meridian"])
+    task_codes, task_names = _sorted_codes(rows["task_name"])
+    pair = tail_codes.astype(np.int64) * max(len(flts), 1) + flt_codes
+    cell = pair * (len(task_names) + 1) + task_codes + 1
+
+    # Rows sorted by (cell, duration); the last row of every cell run is its max.
+    order = np.lexsort((dur_rank, cell))
+    last = np.r_[cell[order][1:] != cell[order][:-1], True] if len(order) else np.zeros(0, dtype=bool)
+    winners = order[last]
+
+    keep = _FOLD_COLUMNS + (["duration_text"] if has_text else ["started_at", "completed_at"])
+    folded = rows.iloc[winners][keep].copy()
+    flag_max = pd.Series(rows["delay_flag"].to_numpy()).groupby(cell).max()
+    folded["delay_flag"] = flag_max.reindex(cell[winners]).to_numpy()
+    for src in ("arrival_fact_meridian", "departure_fact_meridian"):
+        vals = rows[src]
+        present = vals.notna().to_numpy()
+        first_pairs, first_at = np.unique(pair[present], return_index=True)
+        first = pd.Series(vals.to_numpy()[present][first_at], index=first_pairs)
+        folded[src] = first.reindex(pair[winners]).to_numpy(dtype=vals.dtype)
+    return folded
+
+
+def pivot_chunks(chunks, selected_table: str, date_choice: str = "All dates", aircraft_list: list = None,
+                 flight_list: list = None) -> pd.DataFrame:
+    """Pivot an iterable of task-row chunks with memory bounded by the board, not the input.
+
+    Chunks come from a generator, Parquet batches or a DB cursor; filters are applied
+    per chunk (sources that push them down can pass unfiltered arguments). The result
+    equals ``pivot_frame`` over all rows concatenated.
+    """
+    # Folded chunks are kept as parts and refolded together once they outgrow the last
+    # fold, so each row is merged a bounded number of times instead of once per chunk.
+    parts, part_rows, folded_rows = [], 0, 0
+    for chunk in chunks:
+        if time_windows(date_choice) is not None or aircraft_list or flight_list:
+            chunk = _scan_filters(chunk, date_choice, aircraft_list or [], flight_list or [])
+        part = _fold_rows(chunk, selected_table)
+        parts.append(part)
+        part_rows += len(part)
+        if len(parts) > 1 and part_rows > 2 * max(folded_rows, FOLD_CHUNK_ROWS):
+            parts = [_fold_rows(pd.concat(parts, ignore_index=True), selected_table)]
+            part_rows = folded_rows = len(parts[0])
+    if not parts:
+        return pivot_frame(empty_task_rows(), selected_table)
+    folded = _fold_rows(pd.concat(parts, ignore_index=True), selected_table) if len(parts) > 1 else parts[0]
+    return pivot_frame(folded.reset_index(drop=True), selected_table)
@@ -1,24 +1,94 @@
 from pathlib import Path
 import base64
+import io
+import os
+import threading
 from PIL import Image
+from dotenv import load_dotenv
+
+load_dotenv()
 
 
 LOGO_PATH = Path(__file__).parent / "logo.jpg"
+# Longest side of the cached logo variants: header/login image (2x its 56px display) and favicon
+LOGO_HEADER_PX = 112
+LOGO_ICON_PX = 64
+
+_LOGO_ASSETS = {}
+_LOGO_LOCK = threading.Lock()
+
+
+def _encoded(img: Image.Image, size: int, fmt: str, **save_kwargs) -> bytes:
+    small = img.copy()
+    small.thumbnail((size, size), Image.LANCZOS)
+    buf = io.BytesIO()
+    small.save(buf, format=fmt, **save_kwargs)
+    return buf.getvalue()
+
 
+def _logo_assets() -> dict:
+    """Logo variants, shared by every session and rebuilt only when the file's mtime changes."""
+    mtime = LOGO_PATH.stat().st_mtime_ns
+    with _LOGO_LOCK:
+        if _LOGO_ASSETS.get("mtime") != mtime:
+            with Image.open(LOGO_PATH) as img:
+                img = img.convert("RGB")
+                header = _encoded(img, LOGO_HEADER_PX, "JPEG", quality=85, optimize=True)
+                icon = _encoded(img, LOGO_ICON_PX, "PNG", optimize=True)
+            _LOGO_ASSETS.update(
+                mtime=mtime,
+                icon=icon,
+                data_uri="data:image/jpeg;base64," + base64.b64encode(header).decode("ascii"),
+            )
+        return _LOGO_ASSETS
 
-def get_logo_image():
-    return Image.open(LOGO_PATH)
+
+def logo_mtime() -> int:
+    return _logo_assets()["mtime"]
+
+
+def get_logo_icon() -> bytes:
+    """Downscaled PNG for the favicon; bytes skip Streamlit's per-run image re-encode."""
+    return _logo_assets()["icon"]
 
 
 def get_logo_data_uri() -> str:
-    with open(LOGO_PATH, "rb") as f:
-        b64 = base64.b64encode(f.read()).decode("ascii")
-    return f"data:image/jpeg;base64,{b64}"
+    return _logo_assets()["data_uri"]
 
 
 APP_USER = "flight"
 APP_PASS = "task123"
 
+# Stage timing logs and the admin diagnostics panel; off unless FLIGHT_MONITOR_DIAGNOSTICS=1
+DIAGNOSTICS_ENABLED = os.getenv("FLIGHT_MONITOR_DIAGNOSTICS", "").lower() in ("1", "true", "yes")
+ADMIN_USERS = {u.strip() for u in os.getenv("ADMIN_USERS", "").split(",") if u.strip()}
+
+# Background reload of the base dataset every N seconds; 0 keeps lazy loading on first request
+BASE_REFRESH_SECONDS = float(os.getenv("BASE_REFRESH_SECONDS", "0"))
+
+# Compact base dataset: categorical names, narrow integers and duration text formatted on demand
+COMPACT_DATASET = os.getenv("COMPACT_DATASET", "").lower() in ("1", "true", "yes")
+
+# Directory for a memory-mapped base dataset shared by all server processes on a host; empty disables
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "")
+SNAPSHOT_POLL_SECONDS = float(os.getenv("SNAPSHOT_POLL_SECONDS", "5"))
+
+# Directory for an on-disk copy of the base dataset and its indexes, restored on restart; empty disables
+BASE_CACHE_DIR = os.getenv("BASE_CACHE_DIR", "")
+
+# Worker threads/processes for batch pivots (batch_pivot.pivot_batch); 0 uses one per CPU core
+PIVOT_WORKERS = int(os.getenv("PIVOT_WORKERS", "0"))
+
+# Delay analytics: a task counts as delayed when actual > estimated * threshold
+DELAY_ANALYTICS_THRESHOLD = float(os.getenv("DELAY_ANALYTICS_THRESHOLD", "1.18"))
+
+# Live board: the table fragment polls every N seconds and redraws only when the data changed; 0 disables
+LIVE_REFRESH_SECONDS = float(os.getenv("LIVE_REFRESH_SECONDS", "0"))
+
+# Empty URL keeps the in-memory mock dataset; e.g. postgresql+psycopg2://... or sqlite:///tasks.db
+TASKS_DB_URL = os.getenv("TASKS_DB_URL", "")
+TASKS_DB_TABLE = os.getenv("TASKS_DB_TABLE", "ground_tasks")
+
 
 COLOR_NAVY = "#1E293B"
 COLOR_NAVY_TEXT = "#FFFFFF"
@@ -29,5 +99,8 @@ COLOR_ROW_ODD = "#FFFFFF"
 COLOR_DELAY = "#DC2626"
 
 
+BOARD_PAGE_SIZES = [50, 100, 250, 500]
+
+
 DEFAULT_WIDTH = 140
 WIDTHS = {"Aircraft number": 160, "Flight number": 140, "Time of Arrival": 140, "Time of Departure": 140}
@@ -0,0 +1,146 @@
+import json
+import os
+import uuid
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, so every process publishes
+    fcntl = None
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+KEEP_GENERATIONS = 2
+_CURRENT = "CURRENT"
+_PUBLISHER = "PUBLISHER.lock"
+# Bumped whenever the layout written by write_cache changes; older caches are then ignored.
+CACHE_FORMAT = 1
+_CACHE_HEADER = b"flight_monitor.cache"
+
+
+def _path(directory, generation: int) -> Path:
+    return Path(directory) / f"tasks-{generation:08d}.arrow"
+
+
+def current_generation(directory):
+    """Generation number of the published snapshot in ``directory``; None before the first publish."""
+    try:
+        return int((Path(directory) / _CURRENT).read_text().strip())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def publisher_lock(directory):
+    """Take the publisher lock of ``directory`` without waiting: the open lock file, or None if another process holds it.
+
+    The lock lasts until the file is closed or its process exits, so another process can
+    take over from a publisher that died.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    lock = open(directory / _PUBLISHER, "a")
+    if fcntl is not None:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock.close()
+            return None
+    return lock
+
+
+def publish_snapshot(df: pd.DataFrame, directory) -> int:
+    """Write ``df`` as an uncompressed Arrow IPC file and make it the current generation.
+
+    Files are immutable once linked into place, so readers that still map an older
+    generation are unaffected; generations older than KEEP_GENERATIONS are unlinked.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    tmp = directory / f".tasks-{uuid.uuid4().hex}.tmp"
+    table = pa.Table.from_pandas(df)
+    try:
+        with ipc.new_file(tmp, table.schema) as writer:
+            writer.write_table(table)
+        generation = (current_generation(directory) or 0) + 1
+        while True:
+            try:
+                os.link(tmp, _path(directory, generation))  # fails if another process took this number
+                break
+            except FileExistsError:
+                generation += 1
+    finally:
+        tmp.unlink(missing_ok=True)
+
+    if generation > (current_generation(directory) or 0):
+        marker = directory / f".current-{uuid.uuid4().hex}.tmp"
+        marker.write_text(str(generation))
+        os.replace(marker, directory / _CURRENT)
+    for old in directory.glob("tasks-*.arrow"):
+        if int(old.stem.split("-")[1]) <= generation - KEEP_GENERATIONS:
+            old.unlink(missing_ok=True)
+    return generation
+
+
+def read_snapshot(directory, generation: int = None):
+    """Memory-map one generation (default: current) and return ``(generation, frame)``, or None.
+
+    Numeric, datetime and string columns stay backed by the shared page cache, so
+    every process on the host maps the same copy; the frame must be treated as read-only.
+    """
+    generation = current_generation(directory) if generation is None else generation
+    if generation is None:
+        return None
+    source = pa.memory_map(str(_path(directory, generation)))
+    table = ipc.open_file(source).read_all()
+    return generation, table.to_pandas(split_blocks=True)
+
+
+def write_cache(directory, frames: dict, header: dict) -> dict:
+    """Write each ``{name: frame}`` to ``<name>.arrow`` in ``directory`` with ``header`` in its schema metadata.
+
+    The header gains CACHE_FORMAT and a build id shared by the files of one write. Files
+    are replaced one by one, the first name last, so a reader that finds differing build
+    ids has caught a write half-way and ignores the cache.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    header = dict(header, format=CACHE_FORMAT, build=uuid.uuid4().hex)
+    written = []
+    try:
+        for name, df in frames.items():
+            table = pa.Table.from_pandas(df)
+            table = table.replace_schema_metadata({**table.schema.metadata, _CACHE_HEADER: json.dumps(header)})
+            tmp = directory / f".{name}-{header['build']}.tmp"
+            written.append((tmp, directory / f"{name}.arrow"))
+            with ipc.new_file(tmp, table.schema) as writer:
+                writer.write_table(table)
+        for tmp, path in reversed(written):
+            os.replace(tmp, path)
+    finally:
+        for tmp, _ in written:
+            tmp.unlink(missing_ok=True)
+    return header
+
+
+def read_cache(directory, names, fingerprint: str):
+    """Memory-map the files of one write_cache call: ``(header, {name: frame})``, or None.
+
+    None when a file is missing or unreadable, or was written with another CACHE_FORMAT,
+    another ``fingerprint`` or by another write. Frames are read-only, as with read_snapshot.
+    """
+    header, frames = None, {}
+    for name in names:
+        try:
+            table = ipc.open_file(pa.memory_map(str(Path(directory) / f"{name}.arrow"))).read_all()
+            found = json.loads(table.schema.metadata[_CACHE_HEADER])
+        except (OSError, KeyError, TypeError, ValueError):  # ArrowInvalid is a ValueError
+            return None
+        if found.get("format") != CACHE_FORMAT or found.get("fingerprint") != fingerprint:
+            return None
+        if header is not None and found.get("build") != header["build"]:
+            return None
+        header = found
+        frames[name] = table.to_pandas(split_blocks=True)
+    return header, frames
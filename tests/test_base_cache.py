@@ -0,0 +1,57 @@
+import shutil
+
+import pandas as pd
+import pytest
+
+import base_cache
+import mock_data
+from data_source import SqlTaskSource, dispose_engines, write_tasks
+
+
+def _restart():
+    """Forget the base dataset and the base cache state, as a newly started process."""
+    mock_data._BASE_DF = mock_data._BASE_INDEX = None
+    base_cache._BASE_CACHE.update(fingerprint=None, restored=None, seconds=None, watermark=None, caught_up=None,
+                                  saved=None, last_error=None, thread=None)
+    mock_data.bump_data_version()
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(base_cache, "BASE_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(base_cache, "SNAPSHOT_DIR", "")
+    monkeypatch.setattr(mock_data, "SNAPSHOT_DIR", "")
+    mock_data.set_data_source(None)
+    _restart()
+    yield tmp_path
+    _restart()
+    dispose_engines()
+
+
+def _in_progress(rows: pd.DataFrame) -> pd.DataFrame:
+    return rows.assign(completed_at=pd.NaT, actual_duration_minutes=float("nan"))
+
+
+def test_catch_up_completes_cached_tasks_and_adds_new_ones(cache_dir):
+    rows = mock_data.generate_task_rows(30, seed=0).sort_values("started_at", ignore_index=True)
+    old, running, new = rows.iloc[:-40], rows.iloc[-40:-20], rows.iloc[-20:]
+    url = f"sqlite:///{cache_dir}/tasks.db"
+    write_tasks(pd.concat([old, _in_progress(running)]), url)
+    source = SqlTaskSource(url)
+    base_cache.cold_start(source, wait=True)
+
+    # Meanwhile the running tasks complete, half of the new ones complete and half start.
+    write_tasks(pd.concat([old, running, new.iloc[:10], _in_progress(new.iloc[10:])]), url)
+    _restart()
+    status = base_cache.cold_start(source, wait=True)
+
+    assert status["restored"] and status["last_error"] is None
+    assert status["caught_up"] == 40
+    assert len(mock_data.load_base_df()) == len(rows)
+    restored = {tab: mock_data.pivot_table(tab, "All dates", [], []) for tab in ("all", "departure", "arrival")}
+
+    shutil.rmtree(base_cache.BASE_CACHE_DIR)
+    _restart()
+    assert not base_cache.cold_start(source)["restored"]
+    for tab, board in restored.items():
+        assert board.equals(mock_data.pivot_table(tab, "All dates", [], []))
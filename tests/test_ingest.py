@@ -0,0 +1,83 @@
+import pandas as pd
+import pytest
+
+import mock_data
+
+
+@pytest.fixture
+def base():
+    """A small installed base dataset with every board cached, restored after the test."""
+    mock_data.set_data_source(None)
+    frame = mock_data.derive_task_columns(mock_data.generate_task_rows(200, seed=0))
+    mock_data.install_base_df(frame, warm=False)
+    for tab in ("all", "departure", "arrival"):
+        mock_data.pivot_table(tab, "All dates", [], [])
+    yield mock_data.load_base_df()
+    mock_data.install_base_df(mock_data.derive_task_columns(mock_data.generate_task_rows(200, seed=0)), warm=False)
+
+
+def test_events_for_one_task_merge_column_wise(base):
+    task = base.index[3]
+    started = base.at[task, "started_at"] + pd.Timedelta(minutes=5)
+    completed = started + pd.Timedelta(minutes=20)
+    mock_data.ingest_task_events([
+        {"task_id": task, "started_at": started},
+        {"task_id": task, "completed_at": completed},
+    ])
+    row = mock_data.load_base_df().loc[task]
+    assert row["started_at"] == started
+    assert row["completed_at"] == completed
+    assert row["actual_duration_minutes"] == 20
+
+
+def _new_task(base: pd.DataFrame, **values) -> dict:
+    return dict(base.iloc[0][mock_data.TASK_COLUMNS].to_dict(), **values)
+
+
+def test_appended_tasks_keep_given_ids_and_return_assigned_ones(base):
+    given = int(base.index.max()) + 100
+    result = mock_data.ingest_task_events([_new_task(base, task_id=given), _new_task(base), _new_task(base)])
+    assert result["appended"] == 3
+    assert result["ids"][0] == given
+    assert len(set(result["ids"])) == 3 and not set(result["ids"]) & set(base.index)
+
+    flag = 1 - int(base.iloc[0]["delay_flag"])
+    mock_data.ingest_task_events([{"task_id": task, "delay_flag": flag} for task in result["ids"]])
+    rows = mock_data.load_base_df()
+    assert len(rows) == len(base) + 3
+    assert (rows.loc[result["ids"], "delay_flag"] == flag).all()
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_task_appended_in_progress_then_completed(base, compact):
+    if compact:
+        mock_data.install_base_df(mock_data.compact_task_frame(base), warm=False)
+        mock_data.pivot_table("all", "All dates", [], [])
+    started = base.iloc[0]["started_at"]
+    task = _new_task(base, completed_at=pd.NaT, actual_duration_minutes=float("nan"), delay_flag=float("nan"))
+    (task_id,) = mock_data.ingest_task_events([task])["ids"]
+    row = mock_data.load_base_df().loc[task_id]
+    assert pd.isna(row["actual_duration_minutes"]) and row["delay_flag"] == 0
+    assert mock_data.pivot_table("all", "All dates", [], []).equals(mock_data.pivot_frame(mock_data.load_base_df(), "all"))
+
+    mock_data.ingest_task_events([{"task_id": task_id, "completed_at": started + pd.Timedelta(minutes=45)}])
+    rows = mock_data.load_base_df()
+    assert rows.at[task_id, "actual_duration_minutes"] == 45
+    assert mock_data.pivot_table("all", "All dates", [], []).equals(mock_data.pivot_frame(rows, "all"))
+
+
+@pytest.mark.parametrize("tasks", [3, 40])
+def test_cached_boards_are_patched_in_place(base, tasks):
+    # Few touched rows are spliced into the cached boards, many are gathered in one pass.
+    moved = base.iloc[::7].head(tasks)
+    aircraft = base["airfcraft_meridian"].iloc[-1]
+    patched = mock_data.pivot_cache_stats()["patched"]
+    mock_data.ingest_task_events([
+        {"task_id": task, "airfcraft_meridian": aircraft,
+         "completed_at": base.at[task, "completed_at"] + pd.Timedelta(minutes=10)}
+        for task in moved.index
+    ])
+    assert mock_data.pivot_cache_stats()["patched"] == patched + 3
+    rows = mock_data.load_base_df()
+    for tab in ("all", "departure", "arrival"):
+        assert mock_data.pivot_table(tab, "All dates", [], []).equals(mock_data.pivot_frame(rows, tab))
@@ -0,0 +1,30 @@
+import pandas as pd
+
+import mock_data
+
+
+def _strftime_text(df: pd.DataFrame) -> pd.Series:
+    return df["started_at"].dt.strftime("%H:%M:%S") + " - " + df["completed_at"].dt.strftime("%H:%M:%S")
+
+
+def test_duration_text_matches_strftime_with_missing_times():
+    rows = mock_data.generate_task_rows(50, seed=0)
+    rows.loc[rows.index[::7], "completed_at"] = pd.NaT
+    assert mock_data._duration_text(rows).equals(_strftime_text(rows))
+
+
+def test_duration_text_when_every_task_is_in_progress():
+    rows = mock_data.generate_task_rows(5, seed=0).assign(completed_at=pd.NaT)
+    text = mock_data._duration_text(rows)
+    assert text.isna().all()
+    assert text.equals(_strftime_text(rows))
+
+
+def test_pivot_of_a_flight_with_no_completed_tasks():
+    rows = mock_data.generate_task_rows(5, seed=0)
+    flight = rows["flight_number_meridian"].iloc[0]
+    in_progress = rows["flight_number_meridian"] == flight
+    rows.loc[in_progress, "completed_at"] = pd.NaT
+    # A source filtered to that flight derives the columns of its rows alone.
+    assert mock_data.pivot_frame(mock_data.derive_task_columns(rows[in_progress].copy()), "all").empty
+    assert flight not in set(mock_data.pivot_frame(mock_data.derive_task_columns(rows), "all")["Flight number"])
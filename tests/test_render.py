@@ -0,0 +1,95 @@
+import html
+
+import pandas as pd
+import pytest
+
+import mock_data
+import utility
+from settings import COLOR_ARRIVAL_TIME, COLOR_DELAY, COLOR_DEPARTURE, COLOR_ROW_EVEN, COLOR_ROW_ODD
+from utility import col_width, match_delay_series, pick_text_color_for_bg, render_table_html
+
+
+def _render_reference(df_full: pd.DataFrame) -> str:
+    """The original row-by-row renderer, which the inline mode must reproduce byte for byte."""
+    dur_cols = [c for c in df_full.columns if not c.endswith("_delay")]
+    colgroup = "<colgroup>" + "".join([f'<col style="min-width:{col_width(c)}px;">' for c in dur_cols]) + "</colgroup>"
+    thead = "<thead><tr>" + "".join(f"<th>{html.escape(c)}</th>" for c in dur_cols) + "</tr></thead>"
+    rows_html = []
+    for r_idx, row in df_full.iterrows():
+        base_bg = COLOR_ROW_EVEN if (r_idx % 2 == 0) else COLOR_ROW_ODD
+        tds = []
+        for col in dur_cols:
+            val = row[col]
+            sval = html.escape("" if pd.isna(val) else str(val))
+            bg, fg, weight = base_bg, pick_text_color_for_bg(base_bg), "400"
+            if match_delay_series(df_full, col).iloc[r_idx]:
+                bg, fg, weight = COLOR_DELAY, "#ffffff", "600"
+            elif col == "Time of Departure":
+                bg, fg, weight = COLOR_DEPARTURE, pick_text_color_for_bg(COLOR_DEPARTURE), "600"
+            elif col == "Time of Arrival":
+                bg, fg, weight = COLOR_ARRIVAL_TIME, pick_text_color_for_bg(COLOR_ARRIVAL_TIME), "600"
+            style = (
+                f"background:{bg}; color:{fg}; font-weight:{weight}; "
+                f"padding:6px 8px; text-align:center; vertical-align:middle; white-space:normal; word-break:break-word;"
+            )
+            tds.append(f'<td style="{style}">{sval}</td>')
+        rows_html.append("<tr>" + "".join(tds) + "</tr>")
+    tbody = "<tbody>" + "".join(rows_html) + "</tbody>"
+    table_css = """
+    <style>
+    .table-wrap{ width:100%; overflow-x:auto; -webkit-overflow-scrolling:touch; border-radius:12px; box-shadow:0 2px 10px rgba(0,0,0,.06); }
+    .table-wrap table{ width:100%; table-layout:fixed; border-collapse:separate; border-spacing:0; }
+    .table-wrap thead th{ position:sticky; top:0; z-index:1; }
+    .table-wrap th, .table-wrap td{
+      word-break:break-word; white-space:normal; text-align:center; vertical-align:middle; padding:6px 8px;
+    }
+    @media (max-width: 768px){
+      .table-wrap table{ font-size: 12.5px; }
+    }
+    </style>
+    """
+    return f"""
+    {table_css}
+    <div class="table-wrap">
+      <table>
+        {colgroup}{thead}{tbody}
+      </table>
+    </div>
+    """
+
+
+@pytest.fixture
+def board():
+    """A board with delayed cells, a missing value and markup to escape."""
+    rows = mock_data.derive_task_columns(mock_data.generate_task_rows(60, seed=0))
+    df = mock_data.pivot_frame(rows, "all")
+    task = next(c for c in df.columns if f"{c}_delay" in df.columns)
+    df[task] = df[task].astype(object)
+    df.loc[0, task] = None
+    df.loc[1, task] = '<b>"late" & co</b>'
+    utility.clear_row_cache()
+    yield df
+    utility.clear_row_cache()
+
+
+def test_inline_html_matches_the_reference(board):
+    assert (board.filter(like="_delay") == 1).any().any()
+    expected = _render_reference(board)
+    assert render_table_html(board, reuse_rows=False) == expected
+    assert render_table_html(board) == expected  # rendered, then served from the row cache
+    assert render_table_html(board) == expected
+
+
+def test_class_html_is_smaller_and_resolves_to_the_inline_html(board):
+    inline = render_table_html(board, reuse_rows=False)
+    classes = render_table_html(board, css_classes=True, reuse_rows=False)
+    assert len(inline.encode()) > 4 * len(classes.encode())
+
+    stylesheet = utility.cell_stylesheet()
+    resolved = classes.replace(stylesheet, "")
+    for class_open, inline_open in zip(utility._CLASS_TD_OPENS, utility._INLINE_TD_OPENS):
+        cls = class_open.split('"')[1]
+        colors = inline_open.split('"')[1].split(" padding:")[0].replace(" ", "")
+        assert f"td.{cls}{{{colors}}}" in stylesheet
+        resolved = resolved.replace(class_open, inline_open)
+    assert resolved == inline
@@ -0,0 +1,58 @@
+import pytest
+
+import mock_data
+from snapshot import current_generation, publish_snapshot, publisher_lock
+
+
+def _reset():
+    """Forget the base dataset and this process's snapshot state, as a newly started replica."""
+    publisher = mock_data._SNAPSHOT_STATE["publisher"]
+    if publisher is not None:
+        publisher.close()
+    mock_data._BASE_DF = mock_data._BASE_INDEX = None
+    mock_data._SNAPSHOT_STATE.update(generation=None, mapped=False, checked=0.0, publisher=None)
+    mock_data.bump_data_version()
+
+
+@pytest.fixture
+def snapshot_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(mock_data, "SNAPSHOT_DIR", str(tmp_path))
+    mock_data.set_data_source(None)
+    _reset()
+    yield tmp_path
+    _reset()
+
+
+def _rows(flights: int):
+    return mock_data.derive_task_columns(mock_data.generate_task_rows(flights, seed=0))
+
+
+def test_one_publisher_per_directory(tmp_path):
+    first = publisher_lock(tmp_path)
+    assert first is not None
+    assert publisher_lock(tmp_path) is None
+    first.close()
+    second = publisher_lock(tmp_path)
+    assert second is not None
+    second.close()
+
+
+def test_only_the_publisher_refreshes(snapshot_dir):
+    other = publisher_lock(snapshot_dir)  # another replica on the host
+    publish_snapshot(_rows(10), snapshot_dir)
+
+    def loader():
+        raise AssertionError("only the publisher loads the dataset")
+
+    assert mock_data.refresh_base_df(loader)
+    assert mock_data.refresh_status()["snapshot_generation"] == 1
+    publish_snapshot(_rows(20), snapshot_dir)
+    assert mock_data.refresh_base_df(loader)
+    assert mock_data.refresh_status()["snapshot_generation"] == 2
+    assert current_generation(snapshot_dir) == 2
+
+    other.close()  # the publisher exits; the next refresh here takes over
+    assert mock_data.refresh_base_df(lambda: _rows(30))
+    status = mock_data.refresh_status()
+    assert status["snapshot_publisher"] and status["snapshot_generation"] == 3
+    assert len(mock_data.load_base_df()) == len(_rows(30))
@@ -1,4 +1,9 @@
 import html
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
 import pandas as pd
 from settings import (
     DEFAULT_WIDTH, WIDTHS,
@@ -45,51 +50,169 @@ DEFAULT_WIDTH = DEFAULT_WIDTH
 WIDTHS = WIDTHS
 
 
-def render_table_html(df_full: pd.DataFrame) -> str:
+_DELAY_FG = "#ffffff"
+_CELL_LAYOUT = "padding:6px 8px; text-align:center; vertical-align:middle; white-space:normal; word-break:break-word;"
+
+# Cell states resolved for the whole grid; each maps to one (bg, fg, weight) triple.
+STATE_ROW_EVEN, STATE_ROW_ODD, STATE_DELAY, STATE_DEPARTURE, STATE_ARRIVAL = range(5)
+_STATE_COLORS = (
+    (COLOR_ROW_EVEN, pick_text_color_for_bg(COLOR_ROW_EVEN), "400"),
+    (COLOR_ROW_ODD, pick_text_color_for_bg(COLOR_ROW_ODD), "400"),
+    (COLOR_DELAY, _DELAY_FG, "600"),
+    (COLOR_DEPARTURE, pick_text_color_for_bg(COLOR_DEPARTURE), "600"),
+    (COLOR_ARRIVAL_TIME, pick_text_color_for_bg(COLOR_ARRIVAL_TIME), "600"),
+)
+_ACCENT_STATES = {"Time of Departure": STATE_DEPARTURE, "Time of Arrival": STATE_ARRIVAL}
+
+
+_INLINE_TD_OPENS = np.array([
+    f'<td style="background:{bg}; color:{fg}; font-weight:{weight}; {_CELL_LAYOUT}">'
+    for bg, fg, weight in _STATE_COLORS
+], dtype=object)
+
+# Short class names for the same states; the rules live in one generated stylesheet.
+_STATE_CLASSES = ("r0", "r1", "dl", "dp", "ar")
+_CLASS_TD_OPENS = np.array([f'<td class="{c}">' for c in _STATE_CLASSES], dtype=object)
+
+
+def cell_stylesheet() -> str:
+    rules = [
+        f".table-wrap td.{cls}{{background:{bg};color:{fg};font-weight:{weight};}}"
+        for cls, (bg, fg, weight) in zip(_STATE_CLASSES, _STATE_COLORS)
+    ]
+    return "<style>" + "".join(rules) + "</style>"
+
+
+# Rendered <tr> strings shared by every session, keyed by row_keys and bounded by approximate memory.
+ROW_CACHE_MAX_BYTES = 32 * 1024 * 1024
+_ROW_ENTRY_OVERHEAD = 200
+_ROW_LAYOUTS = {}
+_ROW_CACHE = OrderedDict()
+_ROW_CACHE_STATS = {"hits": 0, "misses": 0, "evictions": 0, "bytes": 0}
+_ROW_CACHE_LOCK = threading.Lock()
+
+
+def _row_bytes(key: tuple, row_html: str) -> int:
+    values = key[-1]
+    return sys.getsizeof(row_html) + sys.getsizeof(values) + sum(map(sys.getsizeof, values)) + _ROW_ENTRY_OVERHEAD
+
+
+def row_cache_stats() -> dict:
+    with _ROW_CACHE_LOCK:
+        return dict(_ROW_CACHE_STATS, size=len(_ROW_CACHE))
+
+
+def clear_row_cache():
+    with _ROW_CACHE_LOCK:
+        _ROW_CACHE.clear()
+        for k in _ROW_CACHE_STATS:
+            _ROW_CACHE_STATS[k] = 0
+
+
+def stripe_parity(n: int, start_row: int = 0) -> np.ndarray:
+    return (np.arange(n) + start_row) % 2
+
+
+def cell_states(df_full: pd.DataFrame, dur_cols: list, parity: np.ndarray) -> np.ndarray:
+    """Resolve the styling state of every displayed cell as a (rows, cols) int array."""
+    n = len(df_full)
+    stripe = np.where(parity == 0, STATE_ROW_EVEN, STATE_ROW_ODD)
+    states = np.empty((n, len(dur_cols)), dtype=np.int8)
+    for j, col in enumerate(dur_cols):
+        base = _ACCENT_STATES.get(col)
+        col_state = stripe if base is None else np.full(n, base)
+        delay = match_delay_series(df_full, col).to_numpy(dtype=bool)
+        states[:, j] = np.where(delay, STATE_DELAY, col_state)
+    return states
+
+
+def cell_texts(s: pd.Series) -> list:
+    vals = s.to_numpy(dtype=object)
+    missing = pd.isna(vals)
+    return ["" if miss else html.escape(str(v)) for v, miss in zip(vals, missing)]
+
+
+def render_rows_html(df_full: pd.DataFrame, dur_cols: list, td_opens: np.ndarray, parity: np.ndarray) -> list:
+    states = cell_states(df_full, dur_cols, parity)
+    columns = []
+    for j, col in enumerate(dur_cols):
+        s = df_full[col]
+        if isinstance(s, pd.DataFrame):
+            s = s.iloc[:, 0]
+        opens = td_opens[states[:, j]]
+        columns.append([o + v + "</td>" for o, v in zip(opens, cell_texts(s))])
+    return ["<tr>" + "".join(cells) + "</tr>" for cells in zip(*columns)] if columns else ["<tr></tr>"] * len(df_full)
+
+
+def _layout_id(columns: tuple, css_classes: bool) -> int:
+    """Small id standing for a column layout and CSS mode in row keys; allocated under the lock so ids stay unique."""
+    with _ROW_CACHE_LOCK:
+        return _ROW_LAYOUTS.setdefault((columns, css_classes), len(_ROW_LAYOUTS))
+
+
+def row_keys(df_full: pd.DataFrame, parity: np.ndarray, css_classes: bool) -> list:
+    """Identity of each rendered <tr>: column layout and CSS mode, stripe parity, then the cell values and delay flags."""
+    layout = _layout_id(tuple(df_full.columns), css_classes)
+    values = df_full.to_numpy(dtype=object)
+    missing = df_full.isna().to_numpy()
+    if missing.any():
+        values[missing] = None  # NaN never equals itself, so it could not be found again
+    return [(layout, p, row) for p, row in zip(parity.tolist(), map(tuple, values.tolist()))]
+
+
+def render_rows_cached(df_full: pd.DataFrame, dur_cols: list, td_opens: np.ndarray, parity: np.ndarray,
+                       css_classes: bool) -> list:
+    """Like render_rows_html, but rows already in the shared row cache are reused; only new or changed rows render."""
+    keys = row_keys(df_full, parity, css_classes)
+    rows_html = [None] * len(keys)
+    missing = []
+    with _ROW_CACHE_LOCK:
+        for i, k in enumerate(keys):
+            cached = _ROW_CACHE.get(k)
+            if cached is None:
+                missing.append(i)
+            else:
+                _ROW_CACHE.move_to_end(k)
+                rows_html[i] = cached
+        _ROW_CACHE_STATS["hits"] += len(keys) - len(missing)
+        _ROW_CACHE_STATS["misses"] += len(missing)
+    if not missing:
+        return rows_html
+
+    fresh = render_rows_html(df_full.iloc[missing], dur_cols, td_opens, parity[missing])
+    with _ROW_CACHE_LOCK:
+        for i, row_html in zip(missing, fresh):
+            rows_html[i] = row_html
+            if keys[i] not in _ROW_CACHE:
+                _ROW_CACHE[keys[i]] = row_html
+                _ROW_CACHE_STATS["bytes"] += _row_bytes(keys[i], row_html)
+        while _ROW_CACHE_STATS["bytes"] > ROW_CACHE_MAX_BYTES and _ROW_CACHE:
+            _ROW_CACHE_STATS["bytes"] -= _row_bytes(*_ROW_CACHE.popitem(last=False))
+            _ROW_CACHE_STATS["evictions"] += 1
+    return rows_html
+
+
+def page_bounds(total_rows: int, page: int, page_size: int) -> tuple:
+    """Clamp a 1-based page number and return (page, pages, start, stop) for slicing."""
+    pages = max(1, -(-total_rows // page_size))
+    page = min(max(1, page), pages)
+    start = (page - 1) * page_size
+    return page, pages, start, min(start + page_size, total_rows)
+
+
+def render_table_html(df_full: pd.DataFrame, css_classes: bool = False, start_row: int = 0,
+                      reuse_rows: bool = True) -> str:
     dur_cols = [c for c in df_full.columns if not c.endswith("_delay")]
     colgroup = "<colgroup>" + "".join([f'<col style="min-width:{col_width(c)}px;">' for c in dur_cols]) + "</colgroup>"
     ths = [f"<th>{html.escape(c)}</th>" for c in dur_cols]
     thead = "<thead><tr>" + "".join(ths) + "</tr></thead>"
 
-    rows_html = []
-    for r_idx, row in df_full.iterrows():
-        base_bg = COLOR_ROW_EVEN if (r_idx % 2 == 0) else COLOR_ROW_ODD
-        base_fg = pick_text_color_for_bg(base_bg)
-        tds = []
-        for col in dur_cols:
-            val = row[col]
-
-            if isinstance(val, pd.Series):
-                val = val.iloc[0]
-
-            sval = "" if pd.isna(val) else str(val)
-            sval = html.escape(sval)
-
-            bg = base_bg
-            fg = base_fg
-            weight = "400"
-
-            delay_mask = match_delay_series(df_full, col)
-            if delay_mask.iloc[r_idx]:
-                bg = COLOR_DELAY;
-                fg = "#ffffff";
-                weight = "600"
-            else:
-                if col == "Time of Departure":
-                    bg = COLOR_DEPARTURE;
-                    fg = pick_text_color_for_bg(COLOR_DEPARTURE);
-                    weight = "600"
-                elif col == "Time of Arrival":
-                    bg = COLOR_ARRIVAL_TIME;
-                    fg = pick_text_color_for_bg(COLOR_ARRIVAL_TIME);
-                    weight = "600"
-
-            style = (
-                f"background:{bg}; color:{fg}; font-weight:{weight}; "
-                f"padding:6px 8px; text-align:center; vertical-align:middle; white-space:normal; word-break:break-word;"
-            )
-            tds.append(f'<td style="{style}">{sval}</td>')
-        rows_html.append("<tr>" + "".join(tds) + "</tr>")
+    td_opens = _CLASS_TD_OPENS if css_classes else _INLINE_TD_OPENS
+    parity = stripe_parity(len(df_full), start_row)
+    if reuse_rows:
+        rows_html = render_rows_cached(df_full, dur_cols, td_opens, parity, css_classes)
+    else:
+        rows_html = render_rows_html(df_full, dur_cols, td_opens, parity)
 
     tbody = "<tbody>" + "".join(rows_html) + "</tbody>"
     table_css = """
@@ -105,6 +228,8 @@ def render_table_html(df_full: pd.DataFrame) -> str:
     }
     </style>
     """
+    if css_classes:
+        table_css += cell_stylesheet()
     return f"""
     {table_css}
     <div class="table-wrap">